@@ -1,5 +1,5 @@
-from .util import discover_docs, ParallelProcess, ParallelPool, CalcTime, TimeDelta, SpatialDelta, AutoMake
-from .util import CalcSemiDf, CalcEnhanceDf, BtwnStps, OneStp, SameStp, BridgeVehRestSeg, PrepareSeg
+from .util import discover_docs, ParallelProcess, ParallelPool, CalcTime, TimeDelta, SpatialDelta, AutoMake, SharedFrame
+from .util import CalcSemiDf, CalcEnhanceDf, BtwnStps, OneStp, SameStp, PrepareSeg, SegLookup
 
 from .data_engineering import CheckGTFS, NeedProcess, ExecuteProcess, Ingestion, Maingeo, QaQc
 from .data_engineering import RteEnricher, SpaceTimeInterp, RefineInterp, AggResults
@@ -18,18 +18,18 @@ About: Finalizes the interpolated (cleaned version) results and aggregates based
 		Schema outcomes are provided in this script for all points.
 """
 
-from pandas import read_csv, crosstab, Series, to_datetime, concat, DataFrame
-from ..util import ParallelPool, discover_docs
+from pandas import read_parquet, crosstab, to_datetime, concat, DataFrame
+from ..util import ParallelPool, discover_docs, read_featureclass
 from functools import partial
 from arcgis.features import GeoAccessor
 
 
 class AggResults:
 
-	def __init__(self, start_method, path, shp_path, analyses_folder, requests_folder, L, L2, L3):
+	def __init__(self, start_method, path, shp_path, analyses_folder, requests_folder, L, L2, L3, refiner=None):
 		"""
 		:param start_method: The start method to instantiate parallel processing (Linux -> "fork" except using ArcGIS (use "spawn"); Windows -> "spawn").
-		:param path: The path to the folder (5_conformed/date_folder/day_folder) containing the clean interpolated csv files.
+		:param path: The path to the folder (5_conformed/date_folder/day_folder) containing the clean interpolated parquet files.
 		:param shp_path: The path to where the GTFS shapefiles have been created and stored. Used to merge & acquire spatial comp.
 		:param analyses_folder: The main path where the first aggregation will be exported and stored somewhere in the 6_analyses folder.
 		:param requests_folder: The main path where the final aggregations (hr & daily) will be exported and stored somewhere in the 7_requests folder.
@@ -39,17 +39,24 @@ class AggResults:
 				   export as csv and shapefile.
 		:param L3: List manager to collect agg_rte_daily. Used to concat afterwards (when parallel is complete) and
 				   export as csv and shapefile.
+		:param refiner: Optional RefineInterp (deferred) - if provided, each worker cleans the interpolated file
+						and aggregates the cleaned dataframe in memory, fusing both phases into one pool.
 		"""
 
-		# Get list of cleaned interpolated csv files.
+		# Columns of the clean interpolated files that are used in the aggregations - the rest are pruned when read.
+		self.agg_cols = ['route_id', 'trip_id', 'idx', 'stop_seque', 'stop_id', 'sched_arr', 'off_earr',
+		                 'perf_rate', 'proj_speed', 'off_arrdif', 'perc_chge', 'x', 'y']
+
+		# Get list of cleaned interpolated parquet files - or the interpolated ones if they are cleaned on the fly.
+		is_clean  = int(refiner is None)
 		csv_files = (
 			discover_docs(path=path)
 			[['path', 'filename', 'directory']]
-			.assign(is_csv=lambda r: (r['filename'].str.extract("([^.]+)$", expand=False).str.lower() == "csv").astype(int),
+			.assign(is_csv=lambda r: (r['filename'].str.extract("([^.]+)$", expand=False).str.lower() == "parquet").astype(int),
 			        is_clean=lambda r: r['filename'].str.contains('cleaned').astype(int),
                     rte_name=lambda r: r['filename'].str.split('_').str[1].str.split("-").str[0:2].str.join("-"))
 			        #rte_name=lambda r: r['filename'].str.split("-").str[0:2].str.join('-'))
-			.query('is_csv == 1 and is_clean == 1')
+			.query('is_csv == 1 and is_clean == @is_clean')
 		)
 
 		# Get list of GTFS shapefiles to merge downstream & acquire spatial component.
@@ -78,18 +85,27 @@ class AggResults:
 		                       L=L,
 		                       L2=L2,
 		                       L3=L3,
-		                       file_df=merge_files)
+		                       file_df=merge_files,
+		                       refiner=refiner)
+
+		pool = ParallelPool(start_method=start_method,
+		                    partial_func=partial_func,
+		                    main_list=main_list,
+		                    collect=isinstance(L, list))
 
-		ParallelPool(start_method=start_method,
-		             partial_func=partial_func,
-		             main_list=main_list)
+		# Plain lists ("fork") - gather the aggregations returned by each worker.
+		pool.gather(lists=[L, L2, L3])
 
 		# Export contents to geojson - (originally shapefile, but it is not friendly with column formatting & some values).
 		analyses_name = f"{analyses_folder}/general_aggregation.geojson"
 		hrly_agg      = f"{requests_folder}/hourly_aggregation.geojson"
 		daily_agg     = f"{requests_folder}/daily_aggregation.geojson"
 
-		fsetL  = concat(L).spatial.to_featureset()
+		# off_earr is datetime64 since the interpolated output - export it as the 'YYYY-mm-DD HH:MM:SS' string as before.
+		main_agg = concat(L)
+		main_agg['off_earr'] = main_agg['off_earr'].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+		fsetL  = main_agg.spatial.to_featureset()
 		fsetL2 = concat(L2).spatial.to_featureset()
 		fsetL3 = concat(L3).spatial.to_featureset()
 
@@ -101,10 +117,10 @@ class AggResults:
 				file.write(f.to_geojson)
 
 
-	def _main(self, tmp_csv, L, L2, L3, file_df):
+	def _main(self, tmp_csv, L, L2, L3, file_df, refiner=None):
 		"""
 
-		:param tmp_csv: The individual csv file that is being read and use for aggregation.
+		:param tmp_csv: The individual parquet file that is being read and use for aggregation.
 		:param L: List manager to collect main_agg. Used to concat afterwards (when parallel is complete)
 				  and export as csv and shapefile.
 		:param L2: List manager to collect agg_rte_hrly. Used to concat afterwards (when parallel is complete) and
@@ -112,18 +128,35 @@ class AggResults:
 		:param L3: List manager to collect agg_rte_daily. Used to concat afterwards (when parallel is complete) and
 				   export as csv and shapefile.
 		:param file_df:
-		:return: Indirectly in the self._mainAgg via the list managers.
+		:param refiner: Optional RefineInterp (deferred) to clean the interpolated file in memory first.
+		:return: Indirectly in the self._mainAgg via the list managers; if they are plain lists ("fork"), new lists
+		         holding only the results of this file.
 		"""
 
-		# Read csv file & shapefile
-		tmp_df  = read_csv(tmp_csv)
+		# Read parquet file (only the columns used in the aggregations) & shapefile
+		if refiner is None:
+			tmp_df = read_parquet(tmp_csv, columns=self.agg_cols)
+
+		else:
+			tmp_df = refiner.refine_one(csv=tmp_csv)
+
+			# Failed to clean - already reported by the refiner.
+			if tmp_df is None:
+				return None
+
+			tmp_df = tmp_df[self.agg_cols]
+
 		get_shp = file_df.query('csv_path == @tmp_csv')['shp_path'].iloc[0]
-		tmp_shp = GeoAccessor.from_featureclass(get_shp)
+		tmp_shp = read_featureclass(get_shp)
 
 		# Perform first aggregation - per route_id, trip_id, stop_seque, and sched_arr for
 		# on-time performance (Late, Early, On-Time).
 		perf_df  = self._aggOnTime(tmp_df=tmp_df)
 
+		# Plain lists ("fork") are copies that a worker keeps across tasks - collect this file into its own lists.
+		if isinstance(L, list):
+			L, L2, L3 = [], [], []
+
 		# Mega aggregation function - performs three different aggregation operations.
 		# Agg. Op. 1 => Appended to L, general aggregation per route per trip_id per stop_seque & stop_id & sched_arr.
 		# Agg. Op. 2 => Appended to L2, uses agg. op 1. to aggregate into an hourly basis per route per stop_seque per hour.
@@ -133,6 +166,9 @@ class AggResults:
 		              L=L, L2=L2, L3=L3,
 		              tmp_shp=tmp_shp)
 
+		if isinstance(L, list):
+			return (L, L2, L3)
+
 
 	def _aggOnTime(self, tmp_df):
 		"""
@@ -272,11 +308,9 @@ class AggResults:
 				# Can be used to expand and visualize extensively.
 				.groupby(['route_id', 'trip_id', 'stop_seque', 'stop_id', 'sched_arr', 'AvgSpd', 'Avg_ArrDif',
 			              'Late', 'On-Time', 'Early'])
-				.apply(lambda x: [list(x['proj_speed']), list(x['off_arrdif'])])
-				.apply(Series)
+				.agg(spdList    = ('proj_speed', list),
+				     arrdifList = ('off_arrdif', list))
 				.reset_index()
-				.rename(columns = {0 : 'spdList',
-			                       1 : 'arrdifList'})
 				# Do another merge to get extensive features - off_earr, x, y
 				# (last observations per stop - indicates most recent)
 				.merge(tmp_df, on=['route_id', 'trip_id', 'stop_seque', 'stop_id', 'sched_arr'], how='left')
@@ -348,11 +382,9 @@ class AggResults:
 			agg_rte_hr
 				.pipe(lambda e: e
 			          .groupby(grp_cols)
-			          .apply(lambda x: [list(x['ref_hr']), len(x)])
-			          .apply(Series)
+			          .agg(list_refhr = ('ref_hr', list),
+			               agglength  = ('ref_hr', 'size'))
 			          .reset_index()
-			          .rename(columns={0: 'list_refhr',
-			                           1: 'agglength'})
 			          .merge(e, on=['route_id', 'stop_id', 'stop_seque'], how='left')
 			          .pipe(lambda f: f
 			                .groupby(new_grp, as_index=False)
@@ -5,8 +5,8 @@ Date: Re-modified Q1 - 2022
 About:
 """
 
-from pandas import DataFrame
-from ..util import TimeDelta, SpatialDelta
+from pandas import DataFrame, to_datetime
+from ..util import SpatialDelta
 
 
 class RteEnricher:
@@ -80,8 +80,7 @@ class RteEnricher:
 
 		return (
 			df
-				.groupby(['trip_id', 'stop_seque'], as_index=False)
-				.apply(lambda e: e.assign(Idx_Diff = lambda d: d['index'].diff(1)))
+				.assign(Idx_Diff = lambda d: d.groupby(['trip_id', 'stop_seque'])['index'].diff(1))
 				.sort_values(['trip_id', 'barcode', 'Local_Time'])
 				.query('Idx_Diff >= 0 or Idx_Diff.isnull()', engine='python')
 		)
@@ -170,7 +169,7 @@ class RteEnricher:
 				info  = self._eval_pnts(pnt, pnt_2)
 				paths = [[[info[1], info[0]], [info[3], info[2]]]]
 
-				dist  = SpatialDelta(paths=paths, wkid=info[4]).dist
+				dist  = SpatialDelta.length(paths=paths, wkid=info[4])
 
 				# If the distance is less than or equal 20 meters, then it is considered idle/ very slow transit.
 				if dist <= 20:
@@ -209,7 +208,7 @@ class RteEnricher:
 			df
 				.merge(stop_times, on=['trip_id', 'stop_id'], how='left', validate='m:m') # Merge with the scheduled GTFS file.
 				.drop_duplicates(['Local_Time']) # Reduce unnecessary observations if duplicates arise.
-				.drop(columns=['pickup_type', 'drop_off_type', 'shape_dist_traveled', 'timepoint']) # Remove unnecessary fields.
+				.drop(columns=['pickup_type', 'drop_off_type', 'shape_dist_traveled', 'timepoint'], errors='ignore') # Remove unnecessary fields (if stop_times was read in full).
 				.assign(MaxIndex     = get_max_info[1], # Get max index value of the transit route's undissolved segment.
 			            MaxStpSeq    = get_max_info[0], # Get max stop sequence of the transit route.
 			            true_max_stp = get_max_info[2]) # Indicate if the max stop is true - whether undissolved's stop sequence match with the stop sequence from the stop csv file - a warning of GTFS quality & determine terminus.
@@ -217,20 +216,18 @@ class RteEnricher:
 				.pipe(lambda d: self._last_clean(df=d)) # Another sweep of QA/QC
 				.pipe(lambda d: self._last_clean(df=d)) # Final sweep of QA/QC
 				.drop(columns = ['Idx_Diff'])
-				.groupby(['trip_id'], as_index=False)
-				.apply(lambda e: e.assign(Idx_Left   = lambda d: d['MaxIndex'] - d['index'], # Find how many indices the vehicle of the trip_id has left from its current record.
-			                              Stp_Left   = lambda d: d['MaxStpSeq'] - d['stop_seque'], # Find how many stops the vehicle of the trip_id has left from its current record.
-			                              Idx_Diff   = lambda d: d['Idx_Left'].diff(1), # The difference between index left values - potentially identifies stationary values - compares next set.
-			                              Stp_Diff   = lambda d: d['Stp_Left'].diff(1), # The difference between stop left values - potentially identifies stationary values - compares next set.
-			                              Status     = lambda d: d[['Idx_Diff', 'Stp_Diff', 'stop_seque', 'MaxStpSeq']].apply(lambda r: self._set_mvmt(*r), axis=1), # Pre-determine movement status of the vehicle (will require distance as well).
-			                              val        = 1, # Set value
-			                              idx        = lambda d: d['val'].cumsum(), # Cumulate the number of vehicle movements (aka - recordings; not original after QA/QC) per trip_id
-			                              stat_shift = lambda d: d['Status'].shift(-1), # Shift the Status column up by 1 - consecutive pair comparison of movement status.
-                                          pnt_shift  = lambda d: d['point'].shift(-1),  # Shift the point column up by 1 - consecutive pair comparison of distance via haversine in future
-                                          time_shift = lambda d: d['Local_Time'].shift(-1), # Shift the Local_Time column up by 1 - consecutive recorded time pair comparison via timedelta.
-                                          delta_time = lambda d: d[['Local_Time', 'time_shift']].apply(lambda r: TimeDelta(*r).change_time, axis=1), # Get the time delta between consecutive pair.
-                                          delta_dist = lambda d: d[['Status', 'stat_shift', 'point', 'pnt_shift']].apply(lambda r: self._get_dist(*r), axis=1))) # Get the delta distance between consecutive pair - applies only stationary
-				.drop(columns=['val'])
+				# Per trip_id shifts, diffs, and counts are computed as grouped column operations over the whole route.
+				.assign(Idx_Left   = lambda d: d['MaxIndex'] - d['index'], # Find how many indices the vehicle of the trip_id has left from its current record.
+				        Stp_Left   = lambda d: d['MaxStpSeq'] - d['stop_seque'], # Find how many stops the vehicle of the trip_id has left from its current record.
+				        Idx_Diff   = lambda d: d.groupby('trip_id')['Idx_Left'].diff(1), # The difference between index left values - potentially identifies stationary values - compares next set.
+				        Stp_Diff   = lambda d: d.groupby('trip_id')['Stp_Left'].diff(1), # The difference between stop left values - potentially identifies stationary values - compares next set.
+				        Status     = lambda d: [self._set_mvmt(*r) for r in zip(d['Idx_Diff'], d['Stp_Diff'], d['stop_seque'], d['MaxStpSeq'])], # Pre-determine movement status of the vehicle (will require distance as well).
+				        idx        = lambda d: d.groupby('trip_id').cumcount() + 1, # Cumulate the number of vehicle movements (aka - recordings; not original after QA/QC) per trip_id
+				        stat_shift = lambda d: d.groupby('trip_id')['Status'].shift(-1), # Shift the Status column up by 1 - consecutive pair comparison of movement status.
+				        pnt_shift  = lambda d: d.groupby('trip_id')['point'].shift(-1),  # Shift the point column up by 1 - consecutive pair comparison of distance via haversine in future
+				        time_shift = lambda d: d.groupby('trip_id')['Local_Time'].shift(-1), # Shift the Local_Time column up by 1 - consecutive recorded time pair comparison via timedelta.
+				        delta_time = lambda d: (to_datetime(d['time_shift'], errors='coerce') - to_datetime(d['Local_Time'], errors='coerce')).dt.total_seconds(), # Get the time delta (sec.) between consecutive pair.
+				        delta_dist = lambda d: [self._get_dist(*r) for r in zip(d['Status'], d['stat_shift'], d['point'], d['pnt_shift'])]) # Get the delta distance between consecutive pair - applies only stationary
 				[['trip_id', 'idx', 'barcode', 'Status', 'stat_shift',                          # trip_id - to movement status
 				  'stop_id', 'stop_seque', 'MaxStpSeq', 'true_max_stp', 'Stp_Left', 'Stp_Diff', # stop information
 				  'objectid', 'index', 'MaxIndex', 'Idx_Left', 'Idx_Diff',                      # index information of the undissolved segment
@@ -19,9 +19,10 @@ Requires:
     1) ArcGIS API for Python 
 """
 
-from arcgis.features import GeoAccessor
 from arcgis.geometry import Point, Polyline
-from pandas import json_normalize, DataFrame, Series, concat
+from pandas import DataFrame
+from json import dumps
+from ..util import path_segments, snap_points_to_segments, read_featureclass
 
 
 class Maingeo:
@@ -100,9 +101,9 @@ class Maingeo:
             diss_file   = indiv_rte.Diss_Rte.iloc[0]
             stop_file   = indiv_rte.Stop.iloc[0]
 
-            undiss_rte = GeoAccessor.from_featureclass(undiss_file) # undissolved transit route
-            diss_rte   = GeoAccessor.from_featureclass(diss_file)   # dissolved transit route
-            stop_df    = GeoAccessor.from_featureclass(stop_file)   # transit stop 
+            undiss_rte = read_featureclass(undiss_file) # undissolved transit route
+            diss_rte   = read_featureclass(diss_file)   # dissolved transit route
+            stop_df    = read_featureclass(stop_file)   # transit stop 
 
             return (undiss_rte, diss_rte, stop_df)
 
@@ -116,9 +117,9 @@ class Maingeo:
                 diss_file   = indiv_rte.Alt_Diss_Rte.iloc[0]
                 stop_file   = indiv_rte.Alt_Stop.iloc[0]
 
-                undiss_rte = GeoAccessor.from_featureclass(undiss_file) # undissolved transit route
-                diss_rte   = GeoAccessor.from_featureclass(diss_file)   # dissolved transit route
-                stop_df    = GeoAccessor.from_featureclass(stop_file)   # transit stop
+                undiss_rte = read_featureclass(undiss_file) # undissolved transit route
+                diss_rte   = read_featureclass(diss_file)   # dissolved transit route
+                stop_df    = read_featureclass(stop_file)   # transit stop
 
                 return (undiss_rte, diss_rte, stop_df)
 
@@ -180,14 +181,8 @@ class Maingeo:
         """
 
         try:
-            paths = (
-                dissolved_df
-                    ['SHAPE']
-                    .pipe(json_normalize)
-                    ['paths']
-                    .apply(lambda row: row[0])
-                    .tolist()
-            )
+            # First path of each dissolved part - read directly from the SHAPE dicts.
+            paths = [shp['paths'][0] for shp in dissolved_df['SHAPE']]
 
             return Polyline({'spatialReference' : {'latestWkid' : wkid}, 'paths' : paths})
 
@@ -196,120 +191,33 @@ class Maingeo:
             return 0 
 
 
-    def _trace_point(self, x, y, wkid):
-        """
-        Creates a Point geometry. 
-
-        :param x: The longitude coordinate.
-        :param y: The latitude coordinate.
-        :param wkid: The spatial reference to project.
-
-        :returns: ArcGIS Point geometry. 
-        """
-
-        return Point({'spatialReference' : {'latestWkid' : wkid}, 'x' : x, 'y' : y})
-
-
-    def _extract_point_datum(self, s: Series):
-        """
-        Evaluate the point and convert to json to dictionary. Update the original dataframe 
-        and convert the entries to json format. 
-
-        :param s: A series (individual row) from a dataframe.
-
-        :returns: JSON format. 
-        """
-
-        # Per row
-        entries = s.to_dict()
-
-        point_dict = eval(s['point'])
-        point_dict = json_normalize(point_dict).to_dict(orient='index')[0]
-
-        entries.update(point_dict)
-
-        return json_normalize(entries)
-
-
-    def _extract_point_data(self, d: DataFrame):
-        """
-        Extract the point data into fields (x, y, spatialReference.latestWkid) and append to
-        dataframe. 
-
-        :param d: The DataFrame after the group by trip_id.
-        
-        :returns: Updated dataframe with appended columns. 
-        """
-
-        return (
-            d
-                .apply(self._extract_point_datum, axis=1)
-                .pipe(lambda s: concat(s.tolist()))
-                .drop(columns=["spatialReference.latestWkid"])
-        )
-
-
-    def _snap_pt_line(self, polyline_rte: Polyline, lon_val, lat_val, wkid):
-        """
-        Snap each vehicle location (i.e., point) to the nearest line of the transit route. 
-
-        :param polyline_rte: ArcGIS Geometry - polyline of the transit route.
-        :param lon_val: The longitude coordinate of the vehicle location.
-        :param lat_val: The latitude coordinate of the vehicle location.
-        :param wkid: The spatial reference to project the snapped point.
-
-        :returns: ArcGIS Point geometry with new (i.e., snapped) coordinates. 
-        """
-
-        return polyline_rte.snap_to_line(self._trace_point(x=lon_val, y=lat_val, wkid=wkid))
-
-
-    def _get_atomic_snap_pt_details(self, row: Series, polyline_rte: Polyline, wkid):
+    def _main_snap(self, polyline_rte:Polyline, e: DataFrame, wkid):
         """
-        Get the snap point details for 1 associated combination of Trip ID & Lat/Lon.
+        Snap points to the nearest line of the transit route - all vehicle locations of the transit route
+        are snapped at once against the segments of the polyline.
 
-        :param row: The individual row containing the vehicle spatiotemporal information.
-        :param polyline_rte: ArcGIS Polyline geometry of the transit route.
-        :param wkid: Spatial reference to project the ArcGIS Point of the vehicle's location.
+        :param polyline_rte: ArcGIS geometry (Polyline) of the transit route.
+        :param e: DataFrame of the vehicle locations (trip_id, Local_Time, Lon, Lat).
+        :param wkid: Spatial reference of the snapped Points.
 
-        :returns: A single row DataFrame consists of Trip ID, timestamp, and snapped point details.
+        :returns: A DataFrame of the snap point details (trip_id, Local_Time, point, x, y, wkid). 
         """
 
-        # Snap the point to the nearest line.
-        snap_pt = self._snap_pt_line(polyline_rte=polyline_rte, 
-                                     lon_val=row['Lon'], 
-                                     lat_val=row['Lat'], 
-                                     wkid=wkid)
+        _, x, y = snap_points_to_segments(e['Lon'].to_numpy(), e['Lat'].to_numpy(), *path_segments(polyline_rte['paths']))
 
-        # Return a single row DataFrame consisting of Trip ID, Timestamp, and Snap Point details
+        # The point is kept in ArcGIS JSON form as downstream rebuilds ArcGIS Points from it.
         return (
-            row
-                .pipe(lambda s: DataFrame([s.values], columns=s.index)) # Convert row into a DataFrame
-                [['trip_id', 'Local_Time']] # Select columns of interest
-                .assign(point=str(snap_pt))
+            e
+                [['trip_id', 'Local_Time']]
+                .reset_index(drop=True)
+                .assign(point = [dumps({'x': xx, 'y': yy, 'spatialReference': {'wkid': wkid, 'latestWkid': wkid}})
+                                 for xx, yy in zip(x, y)],
+                        x     = x,
+                        y     = y,
+                        wkid  = wkid)
         )
 
 
-    def _main_snap(self, polyline_rte:Polyline, e: Series, wkid):
-        """
-        Snap points to the nearest line of the transit route and 
-        consolidate list of snap points details into a single DataFrame. 
-
-        :param polyline_rte: ArcGIS geometry (Polyline) of the transit route.
-        :param e: A series from a groupby via trip_id.
-        :param wkid: Spatial reference to project the Points.
-
-        :returns: A concatenated DataFrame of the snap point details. 
-        """
-
-        # Get list of DataFrame with each row consisting of Trip ID, Time, and snap point details
-        snap_pts = [self._get_atomic_snap_pt_details(row=row, polyline_rte=polyline_rte, wkid=wkid)
-                    for index, row in e.iterrows()]
-
-        # Consolidate list of DataFrames into a single DataFrame
-        return concat(snap_pts)
-
-
     def _trace_point_within_segment_set(self, point, segments):
         """
         Check if a point fits/is within a (un)dissolved line, return only the successful match.
@@ -430,11 +338,8 @@ class Maingeo:
 
             fin_df = (
                 indiv_rte
-                    # Group by trip_id and snap each vehicle location to the nearest line on the transit route
-                    .groupby('trip_id', as_index=False)
-                    .apply(lambda e: self._main_snap(polyline_rte=polyline_rte, e=e, wkid=wkid))
-                    .pipe(self._extract_point_data)
-                    .rename(columns = {'spatialReference.wkid' : 'wkid'})
+                    # Snap each vehicle location to the nearest line on the transit route
+                    .pipe(lambda e: self._main_snap(polyline_rte=polyline_rte, e=e, wkid=wkid))
                     # Group by trip_id - use their snapped point location to identify which dissolved segment
                     # they're within - acquire undissolved segment candidates.
                     .groupby(['trip_id'], as_index=False)
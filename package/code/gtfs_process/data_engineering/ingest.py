@@ -11,9 +11,12 @@ Note: The Ingestion Class requires to be in a for loop.
 """
 
 from ..util import discover_docs
-from pandas import DataFrame, read_table, read_csv, to_datetime
+from pandas import DataFrame, read_csv, to_datetime
 from numpy import where
 
+import pyarrow as pa
+import pyarrow.csv as pv
+
 
 class NeedProcess:
 
@@ -53,20 +56,55 @@ class NeedProcess:
 
 class Ingestion:
 
-	def __init__(self, individual_csv_df):
+	def __init__(self, individual_csv_df, use_arrow=True):
 		"""
 		Identify which static GTFS files need to be read based on the same directory where the raw GTFS-RT csv file is located.
 		Read GTFS-RT file that needs to be processed and appropriate static GTFS files.
 		Create dataframe that matches each trip_id to the dissolved & undissolved routes and transit stops shapefiles.
 
 		:params individual_csv_df: Individual row containing information about the GTFS-RT csv file that needs to be processed.
+		:params use_arrow: Read the csv/txt files with the multi-threaded PyArrow parser (default); otherwise, with pandas.
 		"""
 
 		### WARNING - DO NOT CHANGE THIS ORDER IN THE LIST ###	
 		self.rel_files = ['trips.txt', 'shapes.txt', 'routes.txt', 'stops.txt', 'stop_times.txt']
+
+		# Only the columns used downstream are read from the widest static GTFS files.
+		self.use_cols  = {
+			'trips'      : ['route_id', 'trip_id', 'direction_id', 'shape_id'],
+			'stop_times' : ['trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence']
+		}
+		self.use_arrow = use_arrow
 		self.exp_df    = self._mainProcess(individual_csv_df=individual_csv_df)
 
 
+	def _read_file(self, path, usecols=None) -> DataFrame:
+		"""
+		Read a comma delimited file (raw GTFS-RT csv or static GTFS txt) as a dataframe.
+		By default, the PyArrow parser is used and converted to pandas at the end.
+
+		Timestamps (e.g., Local_Time) and GTFS times (e.g., arrival_time past midnight - 25:10:00) are kept as
+		strings so the output matches what pandas reads - empty (or null-like) cells become missing values as in pandas.
+
+		:params path: The path to the file to be read.
+		:params usecols: Optional list of columns to read - the rest are skipped while parsing.
+
+		:returns: DataFrame of the file.
+		"""
+
+		if not self.use_arrow:
+			return read_csv(path, usecols=usecols)
+
+		str_cols = ['Local_Time', 'UTC_Time', 'arrival_time', 'departure_time', 'route_id']
+		table    = pv.read_csv(path,
+		                       read_options=pv.ReadOptions(use_threads=True, block_size=64 << 20),
+		                       convert_options=pv.ConvertOptions(column_types={c: pa.string() for c in str_cols},
+		                                                         strings_can_be_null=True,
+		                                                         include_columns=usecols))
+
+		return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
 	def _txt_need_read(self, gtfs_rt_folder) -> DataFrame:
 		"""
 		Identify which static GTFS files need to be read based on the same directory where the raw GTFS-RT csv file is located.
@@ -118,15 +156,15 @@ class Ingestion:
 		print('Ingestion Process - Reading relevant static GTFS files and raw GTFS-RT.')
 
 		# Read relevant static GTFS files
-		trips 	   = read_table(dict_file['trips'], sep=",")
-		shapes 	   = read_table(dict_file['shapes'], sep=",")
-		routes 	   = read_table(dict_file['routes'], sep=",")
-		stops 	   = read_table(dict_file['stops'], sep=",")
-		stop_times = read_table(dict_file['stop_times'], sep=",")
+		trips 	   = self._read_file(dict_file['trips'], usecols=self.use_cols['trips'])
+		shapes 	   = self._read_file(dict_file['shapes'])
+		routes 	   = self._read_file(dict_file['routes'])
+		stops 	   = self._read_file(dict_file['stops'])
+		stop_times = self._read_file(dict_file['stop_times'], usecols=self.use_cols['stop_times'])
 		
 		# Read raw GTFS-RT csv file
 		rt_df 	   = (
-			read_csv(rt_csv)
+			self._read_file(rt_csv)
 				.assign(Uniquer = lambda l: l['Trip_ID'].astype(str) + "-" + 
 											l['Vehicle_ID'].astype(str) + "-" + 
 											l['Lat'].astype(str) + ";" + 
@@ -15,9 +15,10 @@ Warning Note: This operation runs in parallel from downstream operation.
 			  performing spatial operations in-memory.
 """
 
-from pandas import DataFrame, concat
+from pandas import DataFrame, concat, to_datetime
+from numpy import empty
 from ..util import BtwnStps, OneStp, SameStp
-from ..util import CalcEnhanceDf, CalcSemiDf
+from ..util import CalcEnhanceDf, CalcSemiDf, SegLookup
 
 
 class SpaceTimeInterp:
@@ -173,7 +174,7 @@ class SpaceTimeInterp:
 	def _augmentTravel(self, trip_id, x1, y1, stp_seq, index, status,
                        x2, y2, stp_seq2, index2, stat_shift, stp_diff_shift,
                        delta_time, local_time, time_shift, idx,
-                       undiss_df: DataFrame, stop_times: DataFrame, wkid):
+                       undiss_df: DataFrame, stop_times: DataFrame, wkid, seg_lookup=None):
 		"""
 		The "brains" of the entire operation that inspects the consecutive pair of the grouped trip_id and determines
 		the type of travel that happened, initiates data augmentation per type of stop (i.e., mobility/travel).
@@ -200,6 +201,7 @@ class SpaceTimeInterp:
 		:param undiss_df: The undissolved shapefile read as a spatial dataframe of the transit route.
 		:param stop_times: The schedule (from GTFS static) per stop_id per trip_id.
 		:param wkid: Spatial reference used to project ArcGIS Polyline geometries.
+		:param seg_lookup: SegLookup of the undiss_df - built once per transit route & shared by all consecutive pairs.
 
 		Dependent Classes:
 			1) BtwnStps   --> The build of what happened between the 1st and 2nd veh. of consec. pair - more than 1 transit
@@ -230,7 +232,8 @@ class SpaceTimeInterp:
 					                        index=index,
 					                        index2=index2,
 					                        undiss_df=undiss_df,
-					                        wkid=wkid).btwn_info
+					                        wkid=wkid,
+					                        seg_lookup=seg_lookup).btwn_info
 
 					conx        = spatial_info[0]   # Connection type
 					tot_dist    = spatial_info[1]   # Total distance traveled
@@ -268,7 +271,8 @@ class SpaceTimeInterp:
 					                      index=index,
 					                      index2=index2,
 					                      undiss_df=undiss_df,
-					                      wkid=wkid).one_info
+					                      wkid=wkid,
+					                      seg_lookup=seg_lookup).one_info
 
 					conx        = spatial_info[0]
 					tot_dist    = spatial_info[1]
@@ -315,7 +319,8 @@ class SpaceTimeInterp:
 						                       index2=index2,
 						                       undiss_df=undiss_df,
 						                       wkid=wkid,
-						                       conx_type=conx_type).same_info
+						                       conx_type=conx_type,
+						                       seg_lookup=seg_lookup).same_info
 
 						conx        = spatial_info[0]
 						tot_dist    = spatial_info[1]
@@ -356,7 +361,8 @@ class SpaceTimeInterp:
 						                       index2=index2,
 						                       undiss_df=undiss_df,
 						                       wkid=wkid,
-						                       conx_type=conx_type).same_info
+						                       conx_type=conx_type,
+						                       seg_lookup=seg_lookup).same_info
 
 						conx        = spatial_info[0]
 						tot_dist    = spatial_info[1]
@@ -447,28 +453,39 @@ class SpaceTimeInterp:
 				 due to failure. For schema of concatenated dataframe, see _execEnhanced for more details.
 		"""
 
-		stop_times = stop_times.rename(columns={'stop_sequence' : 'stop_seque'})
+		# Indexed (sorted) by trip_id once - every consecutive pair looks up its trip's schedule instead of querying the whole file.
+		stop_times = stop_times.rename(columns={'stop_sequence' : 'stop_seque'}).set_index('trip_id').sort_index(kind='mergesort')
+		seg_lookup = SegLookup(undiss_df=undiss_df) # Undissolved segments per stop sequence - shared by every consecutive pair.
+
+		# The 2nd recorded of each consecutive pair (shifted per trip_id) - one grouped shift for all fields.
+		pair_cols = {'stp_id_shift'  : 'stop_id',
+		             'stp_sq_shift'  : 'stop_seque',
+		             'stp_diff_shift': 'Stp_Diff',
+		             'index_shift'   : 'index',
+		             'x_shift'       : 'x',
+		             'y_shift'       : 'y'}
+
+		augment_cols = ['trip_id', 'x', 'y', 'stop_seque', 'index', 'Status',
+		                'x_shift', 'y_shift', 'stp_sq_shift', 'index_shift',
+		                'stat_shift', 'stp_diff_shift', 'delta_time',
+		                'Local_Time', 'time_shift', 'idx']
 
 		try:
+			shifted  = enrich_df.groupby('trip_id')[list(pair_cols.values())].shift(-1)
 			final_df = (
 				enrich_df
-					.groupby(['trip_id'])
-					.apply(lambda e: e.assign(stp_id_shift   = lambda d: d['stop_id'].shift(-1),
-				                              stp_sq_shift   = lambda d: d['stop_seque'].shift(-1),
-				                              stp_diff_shift = lambda d: d['Stp_Diff'].shift(-1),
-				                              index_shift    = lambda d: d['index'].shift(-1),
-				                              x_shift        = lambda d: d['x'].shift(-1),
-				                              y_shift        = lambda d: d['y'].shift(-1),
-				                              enhanced_df    = lambda d: d[['trip_id', 'x', 'y', 'stop_seque', 'index', 'Status',
-					                                                        'x_shift', 'y_shift', 'stp_sq_shift', 'index_shift',
-					                                                        'stat_shift', 'stp_diff_shift', 'delta_time',
-					                                                        'Local_Time', 'time_shift', 'idx']]
-				                                                            .apply(lambda r:
-				                                                                    self._augmentTravel(*r, undiss_df,
-				                                                                                        stop_times, wkid),
-				                                                                   axis=1)))
+					.assign(**{k: shifted[v] for k, v in pair_cols.items()})
+					.dropna(subset=['trip_id'])
 			)
 
+			# One sweep over the columns of the consecutive pairs - no Series built per row. The results (DataFrame,
+			# str or None) are placed one by one in an object array so they are not broadcast as arrays.
+			enhanced = empty(len(final_df), dtype=object)
+			for i, r in enumerate(zip(*(final_df[c].to_numpy() for c in augment_cols))):
+				enhanced[i] = self._augmentTravel(*r, undiss_df, stop_times, wkid, seg_lookup)
+
+			final_df = final_df.assign(enhanced_df=enhanced)
+
 			extract_df = (
 				final_df.assign(val_type=lambda d: d['enhanced_df'].apply(lambda r: type(r)))
 			)
@@ -484,8 +501,18 @@ class SpaceTimeInterp:
 
 			L4.append(f"{unique_val},{raw_date},{folder_date},{error_rate}")
 
-			df_name = f"{output_folder}/{raw_date}_{unique_val}_interpolated.csv"
-			concat_dfs.to_csv(df_name, index=False)
+			# Recorded & estimated timestamps as datetime64 columns instead of Python strings. The scheduled ones (tmp_arr,
+			# sched_arr) stay as strings - GTFS arrival_time may run past midnight (e.g., 25:10:00).
+			concat_dfs = concat_dfs.assign(**{c: to_datetime(concat_dfs[c], errors='coerce') for c in ['curr_time', 'est_arr', 'off_earr']})
+
+			# Stored as Parquet - re-read downstream (RefineInterp & AggResults), so skip the csv parse tax.
+			# The nested end_path is kept as a string, the same as it would be in the csv file.
+			df_name = f"{output_folder}/{raw_date}_{unique_val}_interpolated.parquet"
+			(
+				concat_dfs
+					.assign(end_path = lambda d: d['end_path'].astype(str))
+					.to_parquet(df_name, index=False, compression='zstd', row_group_size=1 << 16)
+			)
 
 			return concat_dfs
 
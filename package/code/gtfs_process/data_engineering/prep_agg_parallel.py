@@ -6,14 +6,15 @@ About: Prior to aggregation processing, parallel process interpolated csv files
 """
 
 from ..util import discover_docs, ParallelPool
-from pandas import read_csv, concat, DataFrame
+from pandas import read_parquet, concat, DataFrame
 from functools import partial 
+import os
 
 
 class RefineInterp:
 
 
-	def __init__(self, start_method, L, path, trips_txt: DataFrame): 
+	def __init__(self, start_method, L, path, trips_txt: DataFrame, defer=False): 
 		"""
 		Clean unwanted observations in all interpolated files in parallel prior
 		to aggregation processing. 
@@ -21,15 +22,51 @@ class RefineInterp:
 		:start_method: The method to initiate - typically in Linux -> "fork"; Windows -> "spawn".
 		:param L: The list that is part of the Manager in Multiprocessing 
 					report file error that needs to be assessed. 
-		:param path: The path containing the list of interpolated csv files, 
+		:param path: The path containing the list of interpolated parquet files, 
 					 typically found in "../data/5_conformed/{date_folder}/{raw_date}".
 		:param trips_txt: The trips.txt file to be merged with the interpolated. 
+		:param defer: If True, only prepare - no pool is started. Each interpolated file is then cleaned
+					  via refine_one inside the AggResults pool (one pool for both phases).
 		"""
 		
-		self._mainprocess(start_method=start_method,
-		                  L=L,
-		                  path=path,
-		                  trips_txt=trips_txt)
+		self.L         = L
+		self.trips_txt = self._prep_trips(trips_txt=trips_txt)
+
+		if not defer:
+			self._mainprocess(start_method=start_method,
+			                  L=L,
+			                  path=path,
+			                  trips_txt=self.trips_txt)
+
+
+	def _prep_trips(self, trips_txt: DataFrame) -> DataFrame:
+		"""
+		Reformat the route_id of the trips.txt file to match the naming of the interpolated files (e.g., 1-10144).
+
+		:param trips_txt: The trips.txt file to be merged with the interpolated.
+
+		:return: Dataframe with the schema: route_id, trip_id, direction_id.
+		"""
+
+		return (
+			trips_txt
+				.assign(prt_rte=lambda d: d['route_id'].astype(str).str.split("-").str[0],
+			            new_rte=lambda d: d['prt_rte'] + "-" + d['shape_id'].astype(str))
+				[['new_rte', 'trip_id', 'direction_id']]
+				.rename(columns={'new_rte': 'route_id'})
+		)
+
+
+	def refine_one(self, csv) -> DataFrame:
+		"""
+		Clean a single interpolated file - used when the cleaning is fused with the aggregation.
+
+		:param csv: The interpolated parquet file in the "../data/5_conformed/{date_folder}/{raw_date}".
+
+		:return: The cleaned dataframe or None if it failed (reported in L).
+		"""
+
+		return self._clean_df(csv=csv, L=self.L, trips_txt=self.trips_txt, keep=True)
 
 
 	def _filt_df(self, pipe_df: DataFrame) -> DataFrame:
@@ -48,7 +85,7 @@ class RefineInterp:
 		return concat([pipe_df.iloc[i:ii+1,:] for i,ii in zip(stp_min, stp_max)])
 
 
-	def _clean_df(self, csv, L, trips_txt: DataFrame):
+	def _clean_df(self, csv, L, trips_txt: DataFrame, keep=False):
 		"""
 		Cleaning process - remove unwanted observations including illogical 
 		observations that have very high speed and estimated extreme arrival times 
@@ -71,19 +108,20 @@ class RefineInterp:
 		it may overlap with stop sequence 2. This needs to be removed because it 
 		will give estimations that are not applicable anymore. 
 
-		:param csv: The interpolated csv file in the 
+		:param csv: The interpolated parquet file in the 
 					"../data/5_conformed/{date_folder}/{raw_date}". 
 		:param L: The list that is part of the Manager in Multiprocessing 
 					report file error that needs to be assessed. 
 		:param trips_txt: The trips.txt file to be merged with the interpolated 
+		:param keep: Return the cleaned dataframe (refine_one) - not sent back from the workers of the parallel process.
 
-		:return: If successful, new csv file; otherwise, report error. 
+		:return: If successful, new parquet file (& the cleaned dataframe if keep); otherwise, report error & None. 
 		"""
 
 		try:
 
 			df = (
-				read_csv(csv)
+				read_parquet(csv)
 					# Keep observations that seem logical 
 					.query('proj_speed < 110 and off_arrdif > -1200 \
 							and off_arrdif < 1200')
@@ -99,13 +137,16 @@ class RefineInterp:
 					.reset_index()
 			)
 
-			file_name = f"{csv[:-4]}_cleaned.csv"
+			file_name = f"{os.path.splitext(csv)[0]}_cleaned.parquet"
 
-			df.to_csv(file_name, index=False)
+			df.to_parquet(file_name, index=False, compression='zstd', row_group_size=1 << 16)
+
+			if keep:
+				return df
 
 		except Exception as e:
 			L.append(f"Error,{csv}")
-			pass
+			return None
 
 
 	def _mainprocess(self, start_method, L, path, trips_txt: DataFrame):
@@ -116,24 +157,17 @@ class RefineInterp:
 		:start_method: The method to initiate - typically in Linux -> "fork"; Windows -> "spawn".
 		:param L: The list that is part of the Manager in Multiprocessing 
 					report file error that needs to be assessed. 
-		:param path: The path containing the list of interpolated csv files, 
+		:param path: The path containing the list of interpolated parquet files, 
 					 typically found in "../data/5_conformed/{date_folder}/{raw_date}".
-		:param trips_txt: The trips.txt file to be merged with the interpolated.
+		:param trips_txt: The trips.txt file (reformatted) to be merged with the interpolated.
 		"""
 
 		csv_files = (
 			discover_docs(path=path)
 			[['path', 'filename', 'directory']]
-			.assign(is_csv=lambda r: (r['filename'].str.extract("([^.]+)$", expand=False).str.lower() == "csv").astype(int))
-			.query('is_csv == 1')
-		)
-
-		trips_txt = (
-			trips_txt
-				.assign(prt_rte=lambda d: d['route_id'].astype(str).str.split("-").str[0],
-			            new_rte=lambda d: d['prt_rte'] + "-" + d['shape_id'].astype(str))
-				[['new_rte', 'trip_id', 'direction_id']]
-				.rename(columns={'new_rte': 'route_id'})
+			.assign(is_parquet=lambda r: (r['filename'].str.extract("([^.]+)$", expand=False).str.lower() == "parquet").astype(int),
+			        is_clean=lambda r: r['filename'].str.contains('cleaned').astype(int))
+			.query('is_parquet == 1 and is_clean == 0')
 		)
 
 		partial_func = partial(self._clean_df, L=L, trips_txt=trips_txt)
@@ -35,6 +35,9 @@ from arcpy.management import Dissolve
 from time import strptime
 from tqdm import tqdm 
 
+# Date (e.g., 20211117) or "latest" of the static GTFS hyperlinks
+_GTFS_DATE_RE = re.compile(r'^.*/(\d{8,}|latest).*')
+
 
 class GenShpGTFS:
 
@@ -347,7 +350,8 @@ class GenShpGTFS:
             ParallelProcess(start_method=start_method, 
                             targeter=target_function, 
                             parameters=params, 
-                            split_val=split_val)
+                            split_val=split_val,
+                            reuse=True)
 
 
 class GenCsvGTFS:
@@ -663,7 +667,7 @@ class CheckGTFS:
         href_info = ["".join([self.main_link, g.get('href')]) for g in gtfs_soup][1:]
 
         # Get the date information from the hyperlinks
-        date_info = [re.sub(r'^.*/(\d{8,}|latest).*', r'\1', g.get('href')) for g in gtfs_soup][1:]
+        date_info = [_GTFS_DATE_RE.sub(r'\1', g.get('href')) for g in gtfs_soup][1:]
 
         # Refine the date into date string format (e.g., 20211117 -> 2021-11-17)
         ref_date  = [f"{d[0:4]}-{d[4:6]}-{d[6:]}" if "latest" not in d else "latest" for d in date_info]
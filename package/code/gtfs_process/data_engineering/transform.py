@@ -26,26 +26,45 @@ fundamental concepts are the same).
 """
 
 from . import Ingestion, Maingeo, QaQc, RteEnricher, SpaceTimeInterp, RefineInterp, AggResults
-from ..util import ParallelPool, AutoMake
+from ..util import ParallelPool, AutoMake, SharedFrame
 from functools import partial 
 from multiprocessing import Manager
+from pandas import concat, factorize
+from pandas.api.types import is_string_dtype
+from pathlib import PurePosixPath
 import os
-import re
+
+
+# The project data folder - all stage folders (e.g., 2_staging, 3_interim) are built from it.
+DATA_DIR = PurePosixPath("../data")
+
+# Min. number of GTFS-RT recordings a route needs to be sent to the parallel workflow - a single recording
+# cannot form the consecutive pair used to enrich & interpolate travel.
+MIN_RTE_ROWS = 2
+
+# Routes sent to a worker at once - one route is already seconds of work, so routes are not bundled (a bundle of
+# the longest routes would hold a worker while the others idle).
+ROUTE_CHUNKSIZE = 1
+
+# Write buffer (bytes) of the log files - the errors of a GTFS-RT file are flushed in a few large writes.
+LOG_BUFFER = 1 << 20
 
 
 class ExecuteProcess:
 
-    def __init__(self, csv_inf, start_method, wkid):
+    def __init__(self, csv_inf, start_method, wkid, use_arrow=True):
         """
         :params csv_inf: DataFrame that contains information of each raw GTFS-RT csv file to be processed.
         :params start_method: The method to initiate - typically in Linux -> "fork" (unless ArcPy use "spawn"); Windows -> "spawn".
         :params wkid: The spatial reference to project. 
+        :params use_arrow: Read the raw GTFS-RT and static GTFS files with PyArrow during ingestion (default).
         """
 
         print('Reading relevant files per transit route, generating polyline in memory, and subsetting in parallel.')
         self._iterate_raw_gtfsrt(csv_inf=csv_inf, 
                                  start_method=start_method, 
-                                 wkid=wkid)
+                                 wkid=wkid,
+                                 use_arrow=use_arrow)
 
 
     def _identify_vehicle_loc(self, folder_date, output_folder, raw_date, indiv_rte, wkid, unique_val, L):
@@ -266,7 +285,7 @@ class ExecuteProcess:
         operation - it refers back to the workflow chart (see academic paper - Fig. 3). 
 
         :param unique_rte_values: A list containing unique rtes.
-        :param multiLs: A nested list of list that is part of the Manager in Multiprocessing.
+        :param multiLs: A nested list of list that is part of the Manager in Multiprocessing (plain lists under "fork").
                         0 = Error logging placed in the Maingeo
                             (Schema: raw_date, folder_date, unique_val, error type).
                         1 = % of the dataframe retained in the QaQc - data loss greater than 30% is considered volatile.
@@ -276,13 +295,23 @@ class ExecuteProcess:
                         3 = % of the enriched data lost (error rate) during spatiotemporal interpolation process, error logging included.
                             (Schema: unique_val, raw_date, folder_date, error_rate)
         :params list_folders: List of folders to export contents to their dedicated folder.
-        :params suppl_rt_df: DataFrame of the collected raw GTFS-RT data and file explorer merged.
-        :params stop_times: DataFrame of stop_times.txt.
+        :params suppl_rt_df: DataFrame of the collected raw GTFS-RT data and file explorer merged (or its SharedFrame).
+        :params stop_times: DataFrame of stop_times.txt (or its SharedFrame).
         :params folder_date: The date that belongs to the static GTFS update across the project directory (e.g., 0_external/2021-11-17; 2_staging/2021-11-17)
         :params raw_date: The date of the collected raw GTFS-RT data. 
         :params wkid: The spatial reference to project. 
         """
 
+        # Spawned workers receive the shared dataframes as handles - attach once per worker.
+        if isinstance(suppl_rt_df, SharedFrame):
+            suppl_rt_df = suppl_rt_df.frame()
+        if isinstance(stop_times, SharedFrame):
+            stop_times = stop_times.frame()
+
+        # Plain lists ("fork") are copies that a worker keeps across tasks - collect this route into its own lists.
+        if isinstance(multiLs[0], list):
+            multiLs = [[] for _ in multiLs]
+
         # Go through each transit route in parallel.
         indiv_rte = suppl_rt_df.query('UniqueRte == @unique_rte_values') # Comment out during testing
 
@@ -331,8 +360,12 @@ class ExecuteProcess:
         else:
             pass
 
+        # Plain lists ("fork") - hand them back to the parent to gather.
+        if isinstance(multiLs[0], list):
+            return multiLs
+
         
-    def _iterate_raw_gtfsrt(self, csv_inf, start_method, wkid):
+    def _iterate_raw_gtfsrt(self, csv_inf, start_method, wkid, use_arrow=True):
         """
         Iterate through each unprocessed GTFS-RT file identified and perform spatial and data engineering operations in parallel 
         downstream to generate transit metrics as the final output. The self._spatial_and_dataeng_ops is the main function 
@@ -341,18 +374,19 @@ class ExecuteProcess:
         :params csv_inf: DataFrame that contains information of each raw GTFS-RT csv file to be processed.
         :params start_method: The method to initiate - typically in Linux -> "fork" (unless ArcPy use "spawn"); Windows -> "spawn".
         :params wkid: The spatial reference to project. 
+        :params use_arrow: Read the raw GTFS-RT and static GTFS files with PyArrow during ingestion (default).
         """
 
         # Iterate through each raw GTFS-RT for processing.
-        for c in range(len(csv_inf)):
-            use_files = Ingestion(individual_csv_df=csv_inf.iloc[c]).exp_df
+        for row in csv_inf.itertuples(index=False):
+            use_files = Ingestion(individual_csv_df=row, use_arrow=use_arrow).exp_df
             disc_docs  = use_files[0] # The discover docs
 
             # If discover docs is not empty, proceed major process.
             if len(disc_docs) > 0:
                 #disc_docs.to_csv('../data/2_staging/fileexp.csv', index=False)
-                folder_date = csv_inf.iloc[c].folder_date
-                raw_date    = csv_inf.iloc[c].raw_date
+                folder_date = row.folder_date
+                raw_date    = row.raw_date
 
                 print(f"Parallel Processing GTFS-RT for {raw_date} at GTFS update {folder_date}.")
 
@@ -365,12 +399,13 @@ class ExecuteProcess:
                 stop_times  = use_files[6]
 
                 # Set up folders & create them if they don't exist (e.g., "../data/2_staging/2021-09-30/2021-10-01")
-                staging_folder = f"../data/2_staging/{folder_date}/{raw_date}"
-                interim_folder = f"../data/3_interim/{folder_date}/{raw_date}"
-                processed_folder = f"../data/4_processed/{folder_date}/{raw_date}"
-                conformed_folder = f"../data/5_conformed/{folder_date}/{raw_date}"
-                analyses_folder = f"../data/6_analyses/{folder_date}/{raw_date}"
-                requests_folder = f"../data/7_requests/{folder_date}/{raw_date}"
+                # Workers receive them as plain strings.
+                staging_folder   = str(DATA_DIR / "2_staging" / folder_date / raw_date)
+                interim_folder   = str(DATA_DIR / "3_interim" / folder_date / raw_date)
+                processed_folder = str(DATA_DIR / "4_processed" / folder_date / raw_date)
+                conformed_folder = str(DATA_DIR / "5_conformed" / folder_date / raw_date)
+                analyses_folder  = str(DATA_DIR / "6_analyses" / folder_date / raw_date)
+                requests_folder  = str(DATA_DIR / "7_requests" / folder_date / raw_date)
 
                 AutoMake(storage_folder=staging_folder)
                 AutoMake(storage_folder=interim_folder)
@@ -382,27 +417,48 @@ class ExecuteProcess:
                 list_folders = [staging_folder, interim_folder, processed_folder, conformed_folder]
 
                 # Create an error file 
-                geo_log   = open(f"{staging_folder}/errors.log", "a")
-                inter_log = open(f"{interim_folder}/retention.txt", "a")
-                enrch_log = open(f"{conformed_folder}/retention.txt", "a")
-                intrp_log = open(f"{conformed_folder}/error_rate.txt", "a")
+                geo_log   = open(f"{staging_folder}/errors.log", "a", buffering=LOG_BUFFER)
+                inter_log = open(f"{interim_folder}/retention.txt", "a", buffering=LOG_BUFFER)
+                enrch_log = open(f"{conformed_folder}/retention.txt", "a", buffering=LOG_BUFFER)
+                intrp_log = open(f"{conformed_folder}/error_rate.txt", "a", buffering=LOG_BUFFER)
 
                 # Create a list that will have to be stored while in parallel and then be acquired afterwards.
-                multiLs = [Manager().list() for l in range(0,4)]
+                # Under "fork" plain lists are returned by the workers and gathered - no Manager proxy needed.
+                multiLs = self._make_lists(start_method=start_method, n=4)
 
-                # Merge the file explorer with the raw GTFS-RT csv file. 
-                suppl_rt_df = (
+                # The file explorer is built from trips.txt (one row per trip_id), so the trip_id alone
+                # identifies each row - dedup on that single key instead of hashing all nine columns.
+                rte_keys = (
                     disc_docs
-                        [['route_id', 'trip_id', 'Undiss_Rte', 'Diss_Rte', 'Stop', 'UniqueRte', 
+                        .drop_duplicates(subset=['trip_id'])
+                        [['route_id', 'trip_id', 'Undiss_Rte', 'Diss_Rte', 'Stop', 'UniqueRte',
                           'Alt_Undiss_Rte', 'Alt_Diss_Rte', 'Alt_Stop']]
-                        .drop_duplicates()
-                        .merge(rt_df, left_on='trip_id', right_on='Trip_ID', how='inner', validate='1:m')
                 )
 
+                # Merge the file explorer with the raw GTFS-RT csv file. String trip_ids of both sides are factorized 
+                # once into shared integer codes, so the join hashes integers instead of strings - any other dtypes 
+                # are merged directly (a mismatch, e.g. int64 & str, raises instead of matching nothing).
+                if is_string_dtype(rte_keys['trip_id']) and is_string_dtype(rt_df['Trip_ID']):
+                    trip_codes  = factorize(concat([rte_keys['trip_id'], rt_df['Trip_ID']], ignore_index=True))[0]
+                    suppl_rt_df = (
+                        rte_keys
+                            .assign(trip_code=trip_codes[:len(rte_keys)])
+                            .merge(rt_df.assign(trip_code=trip_codes[len(rte_keys):]), 
+                                   on='trip_code', how='inner', validate='1:m')
+                            .drop(columns=['trip_code'])
+                    )
+
+                else:
+                    suppl_rt_df = rte_keys.merge(rt_df, left_on='trip_id', right_on='Trip_ID', how='inner', validate='1:m')
+
                 #print(disc_docs.columns)
                 #print(suppl_rt_df.columns)
 
-                unique_rtes = suppl_rt_df.UniqueRte.unique() # originally disc_docs
+                # Only dispatch routes with enough recordings - the rest can't produce output downstream,
+                # so they are pruned here instead of paying a worker task each. value_counts orders the routes
+                # from the most recordings to the least - the longest routes start first (shorter tail).
+                rte_counts  = suppl_rt_df['UniqueRte'].value_counts()
+                unique_rtes = rte_counts[rte_counts >= MIN_RTE_ROWS].index.to_numpy()
 
                 ########################################################################################################
                 ####################### MEGA WORKFLOW PROCESS CONDUCTED IN PARALLEL & IN-MEMORY ########################
@@ -410,34 +466,49 @@ class ExecuteProcess:
                 ####################### Ends: _spacetime_interpolation                          ########################
                 ####################### Main function: _spatial_and_dataeng_ops                 ########################
                 ########################################################################################################
+                # Under "spawn" the partial is pickled with every task - publish the two large read-only
+                # dataframes to shared memory once and hand the workers a small handle instead.
+                shared = [] if start_method == "fork" else [SharedFrame(df=suppl_rt_df), SharedFrame(df=stop_times)]
+
                 mult_argu = partial(self._spatial_and_dataeng_ops, 
                                     multiLs=multiLs,
                                     list_folders=list_folders,
-                                    suppl_rt_df=suppl_rt_df,
-                                    stop_times=stop_times,
+                                    suppl_rt_df=shared[0] if shared else suppl_rt_df,
+                                    stop_times=shared[1] if shared else stop_times,
                                     folder_date=folder_date, 
                                     raw_date=raw_date,
                                     wkid=wkid)
 
-                ParallelPool(start_method=start_method, 
-                             partial_func=mult_argu, 
-                             main_list=unique_rtes)
+                try:
+                    pool = ParallelPool(start_method=start_method, 
+                                        partial_func=mult_argu, 
+                                        main_list=unique_rtes,
+                                        collect=start_method == "fork",
+                                        initializer=SharedFrame.preload if shared else None,
+                                        initargs=tuple(shared),
+                                        chunksize=ROUTE_CHUNKSIZE)
+                finally:
+                    [sf.release() for sf in shared]
+
+                pool.gather(lists=multiLs)
 
 
                 ########################################################################################################
                 ####### Next Parallel Process - Refining Interpolated Results & Perform AND Export Aggregations ########
+                ####### Both run in one pool: each worker refines a route and aggregates it in memory.          ########
                 ########################################################################################################
-                other_multiLs = [Manager().list() for l in range(0,4)]
+                # The refiner's error list stays a Manager list - it lives inside the refiner and is not returned.
+                other_multiLs = [Manager().list()] + self._make_lists(start_method=start_method, n=3)
 
-                print("2nd Parallel Processing - refining interpolated results.")
-                RefineInterp(start_method=start_method,
-                             L=other_multiLs[0],
-                             path=conformed_folder,
-                             trips_txt=trips)
+                refiner = RefineInterp(start_method=start_method,
+                                       L=other_multiLs[0],
+                                       path=conformed_folder,
+                                       trips_txt=trips,
+                                       defer=True)
 
                 # Output will be directed to 6_analysis and 7_requests (geojson version).
-                print("3rd Parallel Processing - aggregating results.")
-                shp_path = f"../data/2_staging/{folder_date}/Routes"
+                print("2nd Parallel Processing - refining interpolated results & aggregating results.")
+                shp_path = str(DATA_DIR / "2_staging" / folder_date / "Routes")
                 AggResults(start_method=start_method,
                            path=conformed_folder,
                            shp_path=shp_path,
@@ -445,7 +516,8 @@ class ExecuteProcess:
                            requests_folder=requests_folder,
                            L=other_multiLs[1],
                            L2=other_multiLs[2],
-                           L3=other_multiLs[3])
+                           L3=other_multiLs[3],
+                           refiner=refiner)
 
                 # Export error logs to their destined locations
                 self._extract_list_manager(L=multiLs[0], log_file=geo_log)
@@ -454,18 +526,38 @@ class ExecuteProcess:
                 self._extract_list_manager(L=multiLs[3], log_file=intrp_log)
                 self._extract_list_manager(L=other_multiLs[0], log_file=intrp_log)
 
+                # Flush the buffered errors & release the log files before the next GTFS-RT file.
+                for log_file in (geo_log, inter_log, enrch_log, intrp_log):
+                    log_file.close()
+
                 # Rename the GTFS-RT csv file that it has been completed.
-                csv_file = csv_inf['path'].iloc[c]
-                csv_dir  = csv_inf['directory'].iloc[c]
-                filename = re.sub(r"^.*/([^/]*)$", r"\1", csv_file)  # UNIX folder structures
-                filename = re.sub(r"^.*\\([^\\]*)$", r"\1", filename)  # Windows folder structures
-                os.rename(csv_file, f"{csv_dir}/Complete_{filename}")
+                csv_file = row.path
+                csv_dir  = row.directory
+                filename = os.path.basename(csv_file)
+                os.rename(csv_file, os.path.join(csv_dir, f"Complete_{filename}"))
 
             else:
                 print('fail')
                 pass
 
 
+    def _make_lists(self, start_method, n):
+        """
+        Lists to collect results while in parallel. Under "fork" the workers return their (local) plain lists to be 
+        gathered afterwards, which avoids the proxy cost of the Manager; otherwise, Manager lists are shared.
+
+        :params start_method: The method to initiate - typically in Linux -> "fork" (unless ArcPy use "spawn"); Windows -> "spawn".
+        :params n: Number of lists.
+
+        :return: List of n (empty) lists.
+        """
+
+        if start_method == "fork":
+            return [[] for l in range(0,n)]
+
+        return [Manager().list() for l in range(0,n)]
+
+
     def _extract_list_manager(self, L, log_file):
         """
         After parallel processing is complete, write out errors identified in a log file to be viewed later. 
@@ -474,4 +566,7 @@ class ExecuteProcess:
         :params log_file: The log file that stores written errors. 
         """
 
-        [log_file.write(f"{l}\n") for l in L]
+        # L[:] copies a Manager list in one call (iterating the proxy fetches one element per call).
+        errors = L[:]
+        if errors:
+            log_file.write("\n".join(map(str, errors)) + "\n")
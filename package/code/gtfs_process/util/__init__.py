@@ -4,5 +4,8 @@ from .parallelize import ParallelProcess, ParallelPool
 from .process_time import CalcTime
 from .deltas import TimeDelta, SpatialDelta
 from .universal_cal import CalcSemiDf, CalcEnhanceDf
-from .build_segs import BridgeVehRestSeg, PrepareSeg
+from .build_segs import PrepareSeg, SegLookup
 from .stop_type import BtwnStps, OneStp, SameStp
+from .shared_frame import SharedFrame
+from .snap_segments import path_segments, snap_points_to_segments
+from .read_featureclass import read_featureclass
@@ -27,4 +27,4 @@ class AutoMake:
 
 		:return: None.
 		"""
-		[os.makedirs(storage_folder) if not os.path.isdir(storage_folder) else storage_folder]
+		os.makedirs(storage_folder, exist_ok=True)
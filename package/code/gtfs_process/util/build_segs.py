@@ -3,68 +3,154 @@ Author: Anastassios Dardas, PhD - Higher Education Specialist at Education & Res
 Date: Re-modified Q1-2022
 
 About: 2 Classes with their own unique purpose.
-	a) BridgeVehRestSeg - Converts the coordinate pairs that have been queried into an appropriate
-						  format to build Polyline geometry.
-					    - Used in the PrepareSeg Class for consecutive pair connection type: in-between and one-stop.
-					    - Used individually for consecutive pair connection type: same stop.
+	a) SegLookup        - Precomputed lookup of the undissolved segments per stop sequence - used instead of querying
+						  the undissolved dataframe per consecutive pair (all connection types).
 
 	b) PrepareSeg       - Converts the coordinate pairs that have been queried into an appropriate
-						  format to build Polyline geometry via BridgeVehRestSeg.
+						  format to build Polyline geometry via SegLookup.
 						- Builds the segment paths from 1st veh        --> stop_seque
 														nth stop_seque --> 2nd veh.
 						- Calculates distance of each segment path (1st veh --> stop seque; nth stop seque --> 2nd veh.)
 """
 
-from pandas import json_normalize, DataFrame
+from copy import deepcopy
+from itertools import chain
+from pandas import DataFrame, to_numeric
+from numpy import array, flatnonzero, float64, int64, lexsort
+from operator import eq, gt, lt
 from .deltas import SpatialDelta
 
 
-class BridgeVehRestSeg:
+# Comparisons of the undissolved segment index supported by SegLookup.rest_seg - "<>" takes a (low, high) pair of
+# indices and keeps the segments strictly in-between.
+_ops     = {"==": eq, "<": lt, ">": gt, "<>": lambda i, lh: (i > lh[0]) & (i < lh[1])}
+_no_rows = array([], dtype=int64)
 
-	def __init__(self, filt_undiss: DataFrame):
+
+def _unique_coords(coords):
+	"""
+	Drop duplicated coordinate pairs, keeping the first occurrence (order is preserved).
+
+	:param coords: Array (n, 2) of coordinate pairs.
+
+	:return: Nested list of the unique coordinate pairs.
+	"""
+
+	# A handful of pairs per call - a dict keeps the first occurrence in order without sorting rows (np.unique axis=0).
+	return [list(c) for c in dict.fromkeys(map(tuple, coords.tolist()))]
+
+
+class SegLookup:
+
+	def __init__(self, undiss_df: DataFrame):
 		"""
-		Constructs appropriate format of nested coordinate pair paths.
+		Positions of the undissolved segments per stop sequence, computed once per transit route. Replaces repeated
+		queries on the undissolved dataframe (expression parsed & whole dataframe scanned each time) with a hash
+		lookup on the stop sequence and a NumPy mask on the index of its few segments.
 
-		:param filt_undiss: A queried dataframe from the undissolved segment.
+		:param undiss_df: The spatial dataframe of the undissolved polyline segment.
 		"""
 
-		self.rest_seg = self._bridge_veh_restseg(filt_undiss=filt_undiss)
+		self.undiss_df = undiss_df
+		self.groups    = undiss_df.groupby('stop_seque').indices
+		# Smallest integer type that holds the values (float columns with missing values are kept as they are).
+		self.index     = to_numeric(undiss_df['index'], downcast='integer').to_numpy()
+		self.stop_seq  = to_numeric(undiss_df['stop_seque'], downcast='integer').to_numpy()
+
+		# Start & end coordinate of each segment as arrays (n, 2) - read from the SHAPE json once.
+		self.start_xy  = array([shp['paths'][0][0] for shp in undiss_df['SHAPE']], dtype=float64).reshape(-1, 2)
+		self.end_xy    = array([shp['paths'][0][-1] for shp in undiss_df['SHAPE']], dtype=float64).reshape(-1, 2)
+
+		# (stop sequence, index) -> (first coord pair, last coord pair) of the segment - first occurrence kept.
+		self._ends = {}
+		for key, start, end in zip(zip(self.stop_seq.tolist(), self.index.tolist()), self.start_xy.tolist(), self.end_xy.tolist()):
+			self._ends.setdefault(key, (start, end))
+
+		# rest_seg per (stop sequence, index, op) - the same keys recur across the consecutive pairs of a route.
+		self._rest_cache = {}
 
+		# PrepareSeg traced segments per (x1, y1, stp_seq, index, x2, y2, stp_seq2, index2, wkid) - vehicles dwelling
+		# at the same snapped location produce the same consecutive pair over and over.
+		self.traced = {}
 
-	def _bridge_veh_restseg(self, filt_undiss):
+		# SameStp future distance of the 2nd veh. per (stp_seq2, index2, x2, y2, wkid) - None if nothing remains ahead.
+		self.future = {}
+
+
+	def _positions(self, stp_seq, index, op):
 		"""
-		:param filt_undiss: A queried dataframe from the undissolved segment.
+		:param stp_seq: Stop sequence of the undissolved segments.
+		:param index: The index value of the undissolved segment to compare against.
+		:param op: Comparison of the index - "==", "<", ">", or "<>" (index as a (low, high) pair).
+
+		:return: Array of the row positions (in their original order).
+		"""
+
+		pos = self.groups.get(stp_seq, _no_rows)
 
-		:return: Formatted nested list of coordinate pairs.
+		return pos[_ops[op](self.index[pos], index)]
+
+
+	def stops_between(self, stp_seq, stp_seq2) -> DataFrame:
 		"""
+		Same rows as undiss_df.query('stop_seque in @stp_range').sort_values(['stop_seque', 'index']) where stp_range
+		is range(stp_seq + 1, stp_seq2) - one mask on the stop sequence array instead of a list membership per row.
 
-		# Dictionary to automatically create new columns
-		col_order_from_split = {
-			1: "y",
-			2: "x"
-		}
+		:param stp_seq: Stop sequence of the 1st veh. (excluded).
+		:param stp_seq2: Stop sequence of the 2nd veh. (excluded).
 
-		coord_list = (
-			json_normalize(filt_undiss['SHAPE']) # Convert json-style to columns
-				.assign(start_coord=lambda d: d['paths'].apply(lambda e: e[0][0]), # start coordinate (x)
-			            end_coord=lambda d: d['paths'].apply(lambda e: e[0][-1]))  # end coordinate (y)
-			[['start_coord', 'end_coord']]
-				.stack()      # Stack these columns into one - start_coord, end_coord
-				.reset_index()
-				.rename(columns={0: 'Coord'})
-				.pipe(lambda d:
-				      d.assign(**{col_order_from_split[i + 1]: d['Coord'].str[i] # Split each obs. in coord col.
-				                  for i in range(d['Coord'].str.len().max())}))  # Automatically assign x,y fields
-				.assign(unique=lambda d: d['y'].astype(str) + "," + d['x'].astype(str)) # Create unique x,y coord
-				.drop_duplicates(['unique']) # Drop unnecessary duplicates
-		)['Coord'].tolist() # Convert final column of coordinates into list
+		:return: The undissolved segments in-between the stop sequences - ordered by stop sequence & index.
+		"""
 
-		return coord_list
+		pos = flatnonzero((self.stop_seq > int(stp_seq)) & (self.stop_seq < int(stp_seq2)))
+		pos = pos[lexsort((self.index[pos], self.stop_seq[pos]))]
+
+		return self.undiss_df.iloc[pos]
+
+
+	def ends(self, stp_seq, index):
+		"""
+		:param stp_seq: Stop sequence of the undissolved segment.
+		:param index: The index value of the undissolved segment.
+
+		:return: Tuple (0: first coord pair; 1: last coord pair) of the segment - IndexError if it does not exist.
+		"""
+
+		try:
+			start, end = self._ends[(stp_seq, index)]
+		except KeyError:
+			raise IndexError(f"No undissolved segment for stop sequence {stp_seq} and index {index}")
+
+		return (list(start), list(end))
+
+
+	def rest_seg(self, stp_seq, index, op):
+		"""
+		Start & end coordinates of the matching segments without duplicates - from the precomputed arrays, computed
+		once per (stp_seq, index, op).
+
+		:param stp_seq: Stop sequence of the undissolved segments.
+		:param index: The index value of the undissolved segment to compare against - (low, high) pair if op is "<>".
+		:param op: Comparison of the index - "==", "<", ">", or "<>".
+
+		:return: Formatted nested list of coordinate pairs (empty if no segment matches).
+		"""
+
+		key = (stp_seq, index, op)
+		if key not in self._rest_cache:
+			pos    = self._positions(stp_seq, index, op)
+			coords = array([self.start_xy[pos], self.end_xy[pos]]).transpose(1, 0, 2).reshape(-1, 2)
+			self._rest_cache[key] = _unique_coords(coords=coords)
+
+		# Copy of the coordinate pairs - the paths built from it are not shared between consecutive pairs.
+		return [list(c) for c in self._rest_cache[key]]
 
 
 class PrepareSeg:
 
-	def __init__(self, x1, y1, stp_seq, index, x2, y2, stp_seq2, index2, undiss_df: DataFrame, wkid):
+	__slots__ = ('traced_seg',)
+
+	def __init__(self, x1, y1, stp_seq, index, x2, y2, stp_seq2, index2, undiss_df: DataFrame, wkid, seg_lookup=None):
 		"""
 		Constructs appropriate format of nested coordinate pair paths, builds segment paths, and calculates distance.
 
@@ -78,20 +164,31 @@ class PrepareSeg:
 		:param index2: The index value of the undissolved segment where the 2nd veh. is located.
 		:param undiss_df: The spatial dataframe of the undissolved polyline segment.
 		:param wkid: Spatial reference to project geometry paths.
+		:param seg_lookup: SegLookup of the undiss_df (built once per transit route) - built here if not provided.
 		"""
 
-		self.traced_seg = self._trace_seg(x1=x1, y1=y1, stp_seq=stp_seq, index=index,
-		                                  x2=x2, y2=y2, stp_seq2=stp_seq2, index2=index2,
-		                                  undiss_df=undiss_df, wkid=wkid)
+		if seg_lookup is None:
+			seg_lookup = SegLookup(undiss_df=undiss_df)
+
+		# Reuse the tracing of an identical consecutive pair of the route - a hit hands out a copy, so the paths of two
+		# consecutive pairs are never the same objects (a miss caches the fresh tracing without copying it).
+		key = (x1, y1, stp_seq, index, x2, y2, stp_seq2, index2, wkid)
+		if key in seg_lookup.traced:
+			self.traced_seg = deepcopy(seg_lookup.traced[key])
+		else:
+			self.traced_seg = self._trace_seg(x1=x1, y1=y1, stp_seq=stp_seq, index=index,
+			                                  x2=x2, y2=y2, stp_seq2=stp_seq2, index2=index2,
+			                                  seg_lookup=seg_lookup, wkid=wkid)
+			seg_lookup.traced[key] = self.traced_seg
 
 
-	def _prepare_seg(self, x1, y1, stp_seq, index, x2, y2, stp_seq2, index2, undiss_df: DataFrame, wkid):
+	def _prepare_seg(self, x1, y1, stp_seq, index, x2, y2, stp_seq2, index2, seg_lookup: SegLookup, wkid):
 		"""
 		Querying segments to build paths from:  1st veh to stop seque;
 											    nth stop seque to 2nd veh;
 											    2nd veh. to stop seque (if applicable).
 
-		Dependent Classes: BridgeVehRestSeg, SpatialDelta
+		Dependent Classes: SegLookup, SpatialDelta
 
 		:param x1: Snapped x-coordinate (longitude) of the 1st veh.
 		:param y1: Snapped y-coordinate (latitude) of the 2nd veh.
@@ -101,7 +198,7 @@ class PrepareSeg:
 		:param y2: Snapped y-coordinate (latitude) of the 2nd veh.
 		:param stp_seq2: Stop sequence of the 2nd veh. from consecutive pair.
 		:param index2: The index value of the undissolved segment where the 2nd veh. is located.
-		:param undiss_df: The spatial dataframe of the undissolved polyline segment.
+		:param seg_lookup: SegLookup of the undissolved polyline segments.
 		:param wkid: Spatial reference to project geometry paths.
 
 		:return: Nested list of paths and future distance either:
@@ -116,17 +213,15 @@ class PrepareSeg:
 
 		# Create the 1st veh - snapped coordinate
 		veh_loc_1st   = [x1, y1]
-		query         = f"stop_seque == @stp_seq and index == @index"  # Get the segment coordinates of which the 1st vehicle is snapped on to connect.
-		fst_seg       = undiss_df.query(query)['SHAPE'].iloc[0]['paths'][0][-1]  # Get the last coord pair (after) of the undissolved segment
+		# Get the segment coordinates of which the 1st vehicle is snapped on to connect.
+		fst_seg       = seg_lookup.ends(stp_seq, index)[1]  # Get the last coord pair (after) of the undissolved segment
 		build_1st_seg = [veh_loc_1st, fst_seg]
 
 		# Build the rest of the path that goes towards the first stop sequence - if applicable (more than one dissolved segment to arrive its stop sequence)
-		query = f"stop_seque == @stp_seq and index > @index"
-		filt_undiss = undiss_df.query(query)
+		start_remain_path = seg_lookup.rest_seg(stp_seq, index, ">")
 
-		if len(filt_undiss) >= 1:
+		if len(start_remain_path) >= 1:
 
-			start_remain_path = BridgeVehRestSeg(filt_undiss=filt_undiss).rest_seg
 			final_start_path  = [build_1st_seg, start_remain_path]  # Multi-1st index path to its first stop sequence
 
 		else:
@@ -140,33 +235,25 @@ class PrepareSeg:
 		# Certainly if reaching the last observation - then it won't have a consecutive pair - keep safety switch on
 		try:
 			veh_loc_2nd   = [x2, y2]
-			query         = f"stop_seque == @stp_seq2 and index == @index2"
-			queried_reslt = undiss_df.query(query)
-			# Get the first coord pair (before) of the undissolved segment
-			end_seg       = queried_reslt['SHAPE'].iloc[0]['paths'][0][0]
-			# Get the other coord pair (future) of the undissolved segment
-			fut_seg       = queried_reslt['SHAPE'].iloc[0]['paths'][0][-1]
+			# Get the first coord pair (before) & the other coord pair (future) of the undissolved segment
+			end_seg, fut_seg = seg_lookup.ends(stp_seq2, index2)
 			build_end_seg = [end_seg, veh_loc_2nd]
 
 			# Build the rest of the path that has past its last stop sequence
 			# (aka - go backwards of where it is en-transit to)
 			# if applicable (more than one dissolved segment that has past en-transit).
-			query       = f"stop_seque == @stp_seq2 and index < @index2"
-			filt_undiss = undiss_df.query(query)
+			end_remain_path = seg_lookup.rest_seg(stp_seq2, index2, "<")
 
 			# Building path backwards
-			if len(filt_undiss) >= 1:
-				end_remain_path = BridgeVehRestSeg(filt_undiss=filt_undiss).rest_seg
+			if len(end_remain_path) >= 1:
 				final_end_path  = [end_remain_path, build_end_seg]
 
 				# Build path forward - future
-				query       = f"stop_seque == @stp_seq2 and index > @index2"
-				filt_undiss = undiss_df.query(query)
-				if len(filt_undiss) >= 1:
-					future_remain   = BridgeVehRestSeg(filt_undiss=filt_undiss).rest_seg
+				future_remain = seg_lookup.rest_seg(stp_seq2, index2, ">")
+				if len(future_remain) >= 1:
 					future_seg      = [veh_loc_2nd, fut_seg]
 					future_end_path = [future_seg, future_remain]
-					future_dist     = SpatialDelta(paths=future_end_path, wkid=wkid).dist
+					future_dist     = SpatialDelta.length(paths=future_end_path, wkid=wkid)
 					return [[final_start_path, final_end_path], future_dist]
 
 			else:
@@ -178,7 +265,7 @@ class PrepareSeg:
 			return [final_start_path]
 
 
-	def _trace_seg(self, x1, y1, stp_seq, index, x2, y2, stp_seq2, index2, undiss_df: DataFrame, wkid):
+	def _trace_seg(self, x1, y1, stp_seq, index, x2, y2, stp_seq2, index2, seg_lookup: SegLookup, wkid):
 		"""
 		Constructs appropriate format of nested coordinate pair paths, builds segment paths, and calculates distance.
 
@@ -193,7 +280,7 @@ class PrepareSeg:
 		:param y2: Snapped y-coordinate (latitude) of the 2nd veh.
 		:param stp_seq2: Stop sequence of the 2nd veh. from consecutive pair.
 		:param index2: The index value of the undissolved segment where the 2nd veh. is located.
-		:param undiss_df: The spatial dataframe of the undissolved polyline segment.
+		:param seg_lookup: SegLookup of the undissolved polyline segments.
 		:param wkid: Spatial reference to project geometry paths.
 
 		:return: Tuple (0: Nested lists of paths - length of 2 = [[final_start_path, final_end_path], future_dist]
@@ -206,7 +293,7 @@ class PrepareSeg:
 
 		segs = self._prepare_seg(x1=x1, y1=y1, stp_seq=stp_seq, index=index,
 		                         x2=x2, y2=y2, stp_seq2=stp_seq2, index2=index2,
-		                         undiss_df=undiss_df, wkid=wkid)
+		                         seg_lookup=seg_lookup, wkid=wkid)
 
 		build_segs = segs[0]
 		frst_pth   = build_segs[0]
@@ -225,11 +312,11 @@ class PrepareSeg:
 		end_seg = [s for s in end_pth]
 
 		# To append to DataFrame - consistency purposes
-		beg_seg_match = [ss for s in frst_pth for ss in s]
-		end_seg_match = [ss for s in end_pth for ss in s]
+		beg_seg_match = list(chain.from_iterable(frst_pth))
+		end_seg_match = list(chain.from_iterable(end_pth))
 
-		beg_dist = SpatialDelta(paths=beg_seg, wkid=wkid).dist  # Dist from start to its stop sequence en-transit.
-		end_dist = SpatialDelta(paths=end_seg, wkid=wkid).dist  # Dist from 2nd last stop seq. to end of consecutive veh.
+		# Dist from start to its stop sequence en-transit & dist from 2nd last stop seq. to end of consecutive veh.
+		beg_dist, end_dist = SpatialDelta.batch(paths_list=[beg_seg, end_seg], wkid=wkid)
 
 		consec_pths   = [beg_seg_match, end_seg_match] # List - paths of the 1st veh, 2nd veh
 		consec_dist   = [beg_dist, end_dist]           # List - distances covered from the 1st veh and 2nd veh.
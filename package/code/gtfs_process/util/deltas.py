@@ -3,13 +3,56 @@ Author: Anastassios Dardas, PhD - Higher Education Specialist at Education & Res
 Date: Created Q1-2022
 
 About: 2 Classes with their own unique purpose:
-		a) TimeDelta - uses NumPy to identify the time delta (changes in time) in seconds.
-		b) SpatialDelta - uses the ArcGIS API for Python to construct Polyline geometry and calculate length.
+		a) TimeDelta - uses NumPy to identify the time delta (changes in time) in seconds - per pair or per column.
+		b) SpatialDelta - calculates the geodesic length of a path - pyproj (WGS84 ellipsoid) when available, 
+		   planar length on UTM zones, other spatial references known by pyproj are transformed to lon/lat first, 
+		   otherwise uses the ArcGIS API for Python to construct Polyline geometry and calculate length.
 """
 
-from numpy import datetime64, timedelta64
+from functools import lru_cache
+from numpy import arange, asarray, bincount, datetime64, diff, float64, hypot, int64, isnat, repeat, timedelta64
 from arcgis.geometry import Polyline
 
+try:
+	from pyproj import Geod, Transformer
+	from pyproj.exceptions import CRSError
+	_geod = Geod(ellps="WGS84")
+except ImportError:
+	_geod = None
+
+
+def _is_utm(wkid):
+	"""
+	UTM zones (WGS84 north/south, NAD83) - planar distances on these are within 0.1% of the geodesic ones, so the 
+	vertices are measured directly. Other projected systems (e.g., Web Mercator - 3857) distort length and keep 
+	the geodesic measure.
+
+	:param wkid: The spatial reference number.
+
+	:return: True if wkid is a UTM zone.
+	"""
+
+	return 32601 <= wkid <= 32660 or 32701 <= wkid <= 32760 or 26901 <= wkid <= 26923
+
+
+@lru_cache(maxsize=None)
+def _to_lonlat(wkid):
+	"""
+	Transformer of the spatial reference to WGS84 lon/lat - built once per wkid.
+
+	:param wkid: The spatial reference number.
+
+	:return: pyproj Transformer - None if pyproj is not available, wkid is already 4326, or unknown to pyproj.
+	"""
+
+	if _geod is None or wkid == 4326:
+		return None
+
+	try:
+		return Transformer.from_crs(f"EPSG:{wkid}", "EPSG:4326", always_xy=True)
+	except CRSError:
+		return None
+
 
 class TimeDelta:
 
@@ -39,6 +82,31 @@ class TimeDelta:
 		except Exception as e:
 			return None
 
+	@staticmethod
+	def vectorized(starts, ends, unit='s'):
+		"""
+		Time deltas of whole columns at once - same values as TimeDelta(start, end).change_time per pair.
+
+		:param starts: Array/Series of start times - formatted: 'YYYY-mm-dd HH:MM:SS'
+		:param ends: Array/Series of end times - formatted: 'YYYY-mm-dd HH:MM:SS'
+		:param unit: The unit in seconds of time delta.
+
+		:return: Array of time deltas in seconds - or a list with None where a timestamp is missing/unparseable.
+		"""
+
+		try:
+			delta = asarray(ends, dtype=f"datetime64[{unit}]") - asarray(starts, dtype=f"datetime64[{unit}]")
+
+		# e.g., GTFS times past midnight (25:10:00) - fall back per pair to keep None on those only.
+		except (ValueError, TypeError):
+			return [TimeDelta(start, end).change_time for start, end in zip(starts, ends)]
+
+		secs    = delta.astype('timedelta64[s]').astype('int64')
+		missing = isnat(delta)
+		if missing.any():
+			return [None if m else int(v) for v, m in zip(secs, missing)]
+		return secs
+
 
 class SpatialDelta:
 
@@ -53,17 +121,112 @@ class SpatialDelta:
 		self.dist = self._pth_dist(paths=paths, wkid=wkid)
 
 
-	def _pth_dist(self, paths, wkid):
+	@staticmethod
+	def length(paths, wkid):
 		"""
+		Same as SpatialDelta(paths, wkid).dist - without building an instance (used per row / per consecutive pair).
+
 		:param paths: Nested list of lists in proper format containing coordinate pairs to construct Polyline.
 		:param wkid: The spatial reference number to project the geometry Polyline.
 
 		:return: Distance value in meters.
 		"""
 
+		return SpatialDelta._pth_dist(paths=paths, wkid=wkid)
+
+
+	@staticmethod
+	def between(x1, y1, x2, y2, wkid):
+		"""
+		Length of the straight segment between two points - same as SpatialDelta.length(paths=[[[x1, y1], [x2, y2]]]),
+		without building any path (geodesic on WGS84, planar on UTM zones).
+
+		:param x1: x-coordinate (longitude) of the 1st point.
+		:param y1: y-coordinate (latitude) of the 1st point.
+		:param x2: x-coordinate (longitude) of the 2nd point.
+		:param y2: y-coordinate (latitude) of the 2nd point.
+		:param wkid: The spatial reference number of the points.
+
+		:return: Distance value in meters.
+		"""
+
+		if _geod is not None and wkid == 4326:
+			return round(_geod.inv(x1, y1, x2, y2)[2], 2)
+
+		if _is_utm(wkid):
+			return round(hypot(x2 - x1, y2 - y1), 2)
+
+		return SpatialDelta._pth_dist(paths=[[[x1, y1], [x2, y2]]], wkid=wkid)
+
+
+	@staticmethod
+	def _pth_dist(paths, wkid):
+		"""
+		:param paths: Nested list of lists in proper format containing coordinate pairs to construct Polyline.
+		:param wkid: The spatial reference number to project the geometry Polyline.
+
+		:return: Distance value in meters.
+		"""
+
+		# Lon/Lat on WGS84 - the geodesic length is computed directly in C without building a Polyline.
+		if _geod is not None and wkid == 4326:
+			return round(sum(_geod.line_length([pt[0] for pt in path], [pt[1] for pt in path]) for path in paths), 2)
+
+		# Projected (metres) on a UTM zone - the length of the vertices as they are.
+		if _is_utm(wkid):
+			return round(float(sum(hypot(*diff(asarray(path, dtype=float64)[:, :2], axis=0).T).sum() for path in paths if len(path) > 1)), 2)
+
+		# Any other spatial reference known by pyproj - vertices to lon/lat, then the geodesic length.
+		to_lonlat = _to_lonlat(wkid)
+		if to_lonlat is not None:
+			return round(sum(_geod.line_length(*to_lonlat.transform([pt[0] for pt in path], [pt[1] for pt in path])) for path in paths), 2)
+
 		line = {'paths': paths, 'spatialReference': {'wkid': wkid}}
 
 		poly_path = Polyline(line)
 		distance = round(poly_path.get_length("PRESERVE_SHAPE", "METERS"), 2)
 
-		return distance
\ No newline at end of file
+		return distance
+
+
+	@staticmethod
+	def batch(paths_list, wkid):
+		"""
+		Get the lengths of many paths at once. On WGS84 (with pyproj), the vertices of all paths are flattened into 
+		one array, the consecutive pairs within each path are measured in a single vectorized call and summed per 
+		path (geodesic on WGS84 or after transforming to it, planar on UTM zones); otherwise, falls back to one 
+		SpatialDelta per path.
+
+		:param paths_list: List of nested paths - each in the same format as the paths of a SpatialDelta.
+		:param wkid: The spatial reference number to project the geometry Polyline.
+
+		:return: List of distance values in meters (same order as paths_list).
+		"""
+
+		planar    = _is_utm(wkid)
+		to_lonlat = None if planar else _to_lonlat(wkid)
+		if not planar and to_lonlat is None and (_geod is None or wkid != 4326):
+			return [SpatialDelta.length(paths=paths, wkid=wkid) for paths in paths_list]
+
+		# Vertices of all paths flattened into one array - path id per vertex and owner (position in paths_list) per path.
+		owner   = asarray([i for i, paths in enumerate(paths_list) for path in paths], dtype=int64)
+		lengths = asarray([len(path) for paths in paths_list for path in paths], dtype=int64)
+		xy      = asarray([pt[:2] for paths in paths_list for path in paths for pt in path], dtype=float64).reshape(-1, 2)
+		pid     = repeat(arange(len(lengths)), lengths)
+
+		# Consecutive vertex pairs that stay within the same path.
+		same = pid[1:] == pid[:-1]
+
+		if not same.any():
+			return [0.0 for paths in paths_list]
+
+		x, y = xy[:, 0], xy[:, 1]
+		if to_lonlat is not None:
+			x, y = to_lonlat.transform(x, y)
+
+		if planar:
+			dist = hypot(diff(x)[same], diff(y)[same])
+		else:
+			dist = _geod.inv(x[:-1][same], y[:-1][same], x[1:][same], y[1:][same])[2]
+
+		return [round(float(d), 2) for d in bincount(owner[pid[:-1][same]], weights=dist, minlength=len(paths_list))]
\ No newline at end of file
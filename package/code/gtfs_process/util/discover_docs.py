@@ -7,8 +7,10 @@ About: Finds documents in a defined directory including all sub-folders - return
 """
 
 import os
-from pandas import DataFrame, to_datetime
-from numpy import where 
+from pandas import DataFrame, Series, to_datetime
+from numpy import argsort, array, float64, floor, full, int64, log2, nan, power, where 
+
+STORAGE_UNITS = array(["B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB"])
 
 class DiscoverDocs:
 
@@ -49,30 +51,28 @@ class DiscoverDocs:
 
     @staticmethod
     def _get_human_readable_format_storage_size(size, decimal_places = 3):
+        """
+        Human readable storage sizes for a whole column at once (e.g., 1536 -> '1.500KB').
 
-        storage_size = {"byte":     "B",
-                        "kilobyte": "KB",
-                        "megabyte": "MB",
-                        "gigabyte": "GB",
-                        "terabyte": "TB",
-                        "petabyte": "PB",
-                        "exabyte": "EB",
-                        "zettabyte": "ZB",
-                        "yottabyte": "YB"}
+        :params size: Series of sizes in bytes.
+        :params decimal_places: Number of decimals displayed.
 
-        for unit in storage_size.values():
-            if size < 1024.0:
-                break
-            else: 
-                size /= 1024.0
+        :returns: List of the formatted sizes.
+        """
 
-        return f"{size:.{decimal_places}f}{unit}" 
+        # Number of times the size can be divided by 1024 (unit exponent) - 0 bytes stay in bytes.
+        sizes = size.to_numpy(dtype=float64)
+        exp   = floor(log2(where(sizes > 0, sizes, 1)) / 10).astype(int64).clip(0, len(STORAGE_UNITS) - 1)
+        vals  = sizes / power(1024.0, exp)
+
+        return [f"{v:.{decimal_places}f}{u}" for v, u in zip(vals, STORAGE_UNITS[exp])]
 
     def _get_document_details(self, wd: DataFrame) -> DataFrame:
         """
         Acquire document details (e.g., abspath, ctime, mtime, size, etc.)
 
-        :params wd: The work directory as a dataframe. 
+        :params wd: The work directory as a dataframe - with the accessible, is_document, and st_size fields
+                    already taken from the directory scan (no extra call to the OS per document).
 
         TODO: Implement creation (ctime) and modified (mtime) times. These are platform dependent and 
               if not done properly can produce unexpected outcomes (e.g. mtime displaying as timestamp 
@@ -81,37 +81,73 @@ class DiscoverDocs:
               More details on this issue can be found here: https://stackoverflow.com/questions/237079/how-to-get-file-creation-modification-date-times
         """
 
-        # Some documents metadata is not accessible by the OS module (highly unlikey), trace these instances to avoid crashing the process (e.g. retrieving "ctime" won't work for those instances)
-        details_qc = {
-            "accessible":  lambda r: r['path'].apply(lambda t: os.path.exists(t)).astype(int),
-            "is_document": lambda r: r['path'].apply(lambda t: os.path.isfile(t)).astype(int)
-        }
+        cwd = os.getcwd()
+
+        # Documents whose metadata is not restricted come first, the rest keep no metadata (same order as the scan).
+        has_meta = (wd['is_document'].to_numpy() == 1) & (wd['accessible'].to_numpy() == 1)
+        order    = argsort(~has_meta, kind='stable')
+        has_meta = has_meta[order]
+        n_meta   = int(has_meta.sum())
+        paths    = wd['path'].to_numpy()[order]
+
+        # Get the absolute path (instead of the default relative path in the walk_directory method)
+        abspath = full(len(paths), nan, dtype=object)
+        abspath[:n_meta] = [os.path.normpath(os.path.join(cwd, t)) for t in paths[:n_meta]]
+
+        # Get the size of the document (bytes by default, future feature may use parameter to specify GB, TB, human readable, etc)
+        size     = Series(wd['st_size'].to_numpy()[order]).where(has_meta)
+        size_hrf = full(len(paths), nan, dtype=object)
+        size_hrf[:n_meta] = self._get_human_readable_format_storage_size(size.iloc[:n_meta])
+
+        return DataFrame({'abspath'   : abspath,
+                          'path'      : paths,
+                          'directory' : wd['directory'].to_numpy()[order],
+                          'filename'  : wd['filename'].to_numpy()[order],
+                          # 'ctime', 'mtime',
+                          'size'      : size.to_numpy(),
+                          'size_hrf'  : size_hrf},
+                         index=wd.index[order])
+
+    def _scan_directory(self, path: str):
+        """
+        Walk the folder & sub-folders (top-down, same as os.walk) with os.scandir - the details of each
+        file come from its DirEntry, which caches what the directory read already returned.
 
-        details_doc = {
-            "abspath"  : lambda r: r['path'].apply(lambda t: os.path.abspath(t)),                               # Get the absolute path (instead of the default relative path in the walk_directory method)
-            # "ctime"    : lambda r: r['path'].apply(lambda t: os.path.getctime(t)).pipe(to_datetime, unit='s'),  # Get the creation time (convert from Unix Epoch to human readable)
-            # "mtime"    : lambda r: r['path'].apply(lambda t: os.path.getmtime(t)).pipe(to_datetime, unit='s'),  # Get the modified time (convert from Unix Epoch to human readable)
-            "size"     : lambda r: r['path'].apply(lambda t: os.path.getsize(t)),                               # Get the size of the document (bytes by default, future feature may use parameter to specify GB, TB, human readable, etc)
-            "size_hrf" : lambda r: r["size"].apply(self._get_human_readable_format_storage_size) 
-        }
+        :params path: The string path.
 
-        order_cols = ['abspath', 'path', 'directory', 'filename',
-                      # 'ctime', 'mtime',
-                      'size', 'size_hrf']
+        :returns: Generator of tuples (folder, filename, accessible, is_document, size in bytes).
+        """
 
-        return (
-            wd
-                .assign(**details_qc)
-                # Fetch metadata for those files whose metadata is not restricted
-                .pipe(lambda d: 
-                    d
-                        .query('is_document == 1 and accessible == 1')
-                        .assign(**details_doc)
-                        .append(d.query('is_document == 0 or accessible == 0'))
-                )
-                [order_cols]
-        )
+        subfolders = []
+
+        # Same as os.walk - folders that can't be listed are skipped.
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
 
+            if is_dir:
+                # Same as os.walk - symbolic links to folders are not followed.
+                if not entry.is_symlink():
+                    subfolders.append(entry.path)
+                continue
+
+            try:
+                stat = entry.stat()
+                yield (path, entry.name, 1, int(entry.is_file()), stat.st_size)
+
+            except OSError:
+                # Some documents metadata is not accessible (highly unlikely) - trace these instances to avoid crashing the process.
+                yield (path, entry.name, 0, 0, -1)
+
+        for folder in subfolders:
+            yield from self._scan_directory(folder)
 
     def _walk_directory(self, path: str) -> DataFrame:
         """
@@ -122,10 +158,6 @@ class DiscoverDocs:
         :returns: Final DataFrame that provides path, directory, and filename. 
         """
 
-        list_of_files_only = [(folder, filename) 
-                              for folder, subfolders, filenames in os.walk(path)
-                              for filename in filenames]
-
         details_path = {
             "dir"       : lambda r: r['dir'].replace("\\\\", "/"),
             "directory" : lambda r: r['dir'] + r['dir'].str.endswith('/').pipe(where, "", "/"),
@@ -133,9 +165,9 @@ class DiscoverDocs:
         }
 
         return (
-            DataFrame(list_of_files_only, columns=['dir', 'filename'])
+            DataFrame(list(self._scan_directory(path)), columns=['dir', 'filename', 'accessible', 'is_document', 'st_size'])
                 .assign(**details_path)
-                [['path', 'directory', 'filename']]
+                [['path', 'directory', 'filename', 'accessible', 'is_document', 'st_size']]
                 # Get metadata about the document (i.e., creation, modification, etc)
                 .pipe(self._get_document_details)
         )
@@ -6,28 +6,88 @@ About: Perform parallel processing.
 
 """
 
-from multiprocessing import Process, Pool, set_start_method, cpu_count
+from atexit import register
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, set_start_method, cpu_count
 from tqdm import tqdm 
+import sys
+
+_start_method = None
+_shared_pools = {}
+
+# ProcessPoolExecutor raises a ValueError on Windows for more than 61 workers (multiprocessing.Pool has no such cap).
+_WIN_MAX_WORKERS = 61
+
+
+def _set_start_method(start_method):
+	"""
+	Set the start method of multiprocessing - only when it differs from the one set on a previous call.
+
+	:params start_method: The method to initiate - typically in Linux -> "fork"; Windows -> "spawn".
+	"""
+
+	global _start_method
+	if _start_method != start_method:
+		set_start_method(method=start_method, force=True)
+		_start_method = start_method
+
+
+def shared_pool(start_method, processes):
+	"""
+	Get a persistent process pool shared across the calls of ParallelProcess (reuse=True) - the workers start and
+	import the heavy dependencies (e.g., arcgis, pandas) once instead of per call. Closed at interpreter exit.
+
+	:params start_method: The method to initiate - typically in Linux -> "fork"; Windows -> "spawn".
+	:params processes: Number of workers of the pool.
+
+	:return: The multiprocessing pool.
+	"""
+
+	key = (start_method, processes)
+	if key not in _shared_pools:
+		_shared_pools[key] = get_context(start_method).Pool(processes=processes)
+	return _shared_pools[key]
+
+
+def _max_workers():
+	"""
+	:return: Number of workers of a ProcessPoolExecutor - one per logical CPU, capped on Windows.
+	"""
+
+	if sys.platform == 'win32':
+		return min(cpu_count(), _WIN_MAX_WORKERS)
+	return cpu_count()
+
+
+@register
+def _close_shared_pools():
+	for pool in _shared_pools.values():
+		pool.close()
+		pool.join()
+	_shared_pools.clear()
+
 
 class ParallelProcess:
 	
-	def __init__(self, start_method, targeter, parameters, split_val):
+	def __init__(self, start_method, targeter, parameters, split_val, reuse=False):
 		"""
-		Use the Process function in multiprocessing to parallel process. 
+		Use a pool of processes in multiprocessing to parallel process - one task per chunk. 
 
 		:params start_method: The method to initiate - typically in Linux -> "fork"; Windows -> "spawn". 
 		:params targeter: The custom function that is to be parallel processed. 
 		:params parameters: The parameters required in the custom function. 
 		:params split_val: The list that is to be split into chunks. 
+		:params reuse: Run on the module-level shared pool (see shared_pool) - for callers invoking ParallelProcess many times.
 		"""
 
 		self._process(start_method=start_method, 
 					  targeter=targeter, 
 					  parameters=parameters, 
-					  split_val=split_val)
+					  split_val=split_val,
+					  reuse=reuse)
 
 
-	def _process(self, start_method, targeter, parameters, split_val):
+	def _process(self, start_method, targeter, parameters, split_val, reuse=False):
 		"""
 		Initiate parallel processing. 
 
@@ -35,47 +95,93 @@ class ParallelProcess:
 		:params targeter: The custom function that is to be parallel processed. 
 		:params parameters: The parameters required in the custom function. 
 		:params split_val: The list that is to be split into chunks. 
+		:params reuse: Run on the module-level shared pool instead of a pool for this call only.
 		"""
 
-		set_start_method(method=start_method, force=True)
-		processes = []
-		for i in range(len(split_val)):
-			new_param = (split_val[i], ) + parameters[1:]
-			p = Process(target = targeter, args = new_param)
-			processes.append(p)
-			p.start()
-		for process in processes:
-			process.join()
+		# Nothing to process - Pool(processes=0) raises a ValueError.
+		if len(split_val) == 0:
+			return
+
+		_set_start_method(start_method=start_method)
+		params = [(split_val[i], ) + tuple(parameters[1:]) for i in range(len(split_val))]
+		if reuse:
+			shared_pool(start_method=start_method, processes=cpu_count()).starmap(targeter, params)
+		else:
+			with get_context(start_method).Pool(processes=len(split_val)) as pool:
+				pool.starmap(targeter, params)
 
 
 class ParallelPool:
 
-	def __init__(self, start_method, partial_func, main_list):
+	def __init__(self, start_method, partial_func, main_list, collect=False, initializer=None, initargs=(), chunksize=None):
 		"""
-		Use the Pool function in multiprocessing to parallel process. 
+		Use a process pool (concurrent.futures) to parallel process. 
 
 		:params start_method: The method to initiate - typically in Linux -> "fork"; Windows -> "spawn".
 		:params partial_func: A custom partial function that takes most of the parameters of a custom function to be parallel processed.
 		:params main_list: A numpy array list that has been chunked into n number of cores.
+		:params collect: Keep what the custom function returns per task in self.results (e.g., to gather plain lists).
+		:params initializer: Optional function run once when each worker starts (e.g., attach shared dataframes).
+		:params initargs: Arguments of the initializer.
+		:params chunksize: Number of items sent to a worker at once - default len(main_list) / (workers * 4), min. 1;
+		                   always 1 if collect (the returned lists of a chunk would otherwise be gathered once per item).
 		"""
 
-		self._pool(start_method=start_method, partial_func=partial_func, main_list=main_list)
+		self.results = self._pool(start_method=start_method, 
+		                          partial_func=partial_func, 
+		                          main_list=main_list, 
+		                          collect=collect,
+		                          initializer=initializer,
+		                          initargs=initargs,
+		                          chunksize=chunksize)
 
 
-	def _pool(self, start_method, partial_func, main_list):
+	def _pool(self, start_method, partial_func, main_list, collect=False, initializer=None, initargs=(), chunksize=None):
 		"""
 		Initiate parallel processing. 
 
 		:params start_method: The method to initiate - typically in Linux -> "fork"; Windows -> "spawn".
 		:params partial_func: A custom partial function that takes most of the parameters of a custom function to be parallel processed.
 		:params main_list: A numpy array list that has been chunked into n number of cores. 
+		:params collect: Keep what the custom function returns per task.
+		:params initializer: Optional function run once when each worker starts.
+		:params initargs: Arguments of the initializer.
+		:params chunksize: Number of items sent to a worker at once - amortizes the pickling/IPC per item (ignored if collect).
+
+		:return: List of the returned values (in order of main_list) if collect; otherwise, empty list.
 		"""
 
-		set_start_method(method=start_method, force=True)
-		with Pool(processes=cpu_count()) as p:
-			max_ = len(main_list)
-			with tqdm(total=max_) as pbar:
-				for i, _ in enumerate(p.imap_unordered(partial_func, main_list)):
+		if collect:
+			# A worker keeps appending to its plain lists across the items of a chunk - one item per task
+			# so that each returned value only holds the entries of its own item.
+			chunksize = 1
+		elif chunksize is None:
+			chunksize = max(1, len(main_list) // (_max_workers() * 4))
+
+		results = []
+		_set_start_method(start_method=start_method)
+		with ProcessPoolExecutor(max_workers=_max_workers(), 
+		                         mp_context=get_context(start_method), 
+		                         initializer=initializer, 
+		                         initargs=initargs) as p:
+			with tqdm(total=len(main_list)) as pbar:
+				for res in p.map(partial_func, main_list, chunksize=chunksize):
+					if collect:
+						results.append(res)
 					pbar.update()
-			p.close()
-			p.join()
\ No newline at end of file
+
+		return results
+
+
+	def gather(self, lists):
+		"""
+		Extend the lists of the parent process with the lists returned by each task. Used when plain lists replace
+		the Manager lists ("fork") - the appends of the workers stay local to their copy and are returned instead.
+
+		:params lists: The lists to extend - same order as the lists returned by the custom function.
+		"""
+
+		for res in self.results:
+			if res is not None:
+				for L, part in zip(lists, res):
+					L.extend(part)
\ No newline at end of file
@@ -6,7 +6,7 @@ About: Times the runtime of a process.
 
 """
 
-from time import time
+from time import perf_counter_ns
 
 class CalcTime:
 
@@ -17,19 +17,36 @@ class CalcTime:
 	def starter(self):
 		"""
 		Initiate the start time. 
+
+		:return: Monotonic start time in nanoseconds.
 		"""
 
-		start_time = time()
+		start_time = perf_counter_ns()
 		return start_time
 
 
 	def finisher(self, start_time):
 		"""
 		Get the finish time. 
+
+		:params start_time: The start time returned by starter.
+
+		:return: Tuple (hours, minutes, seconds) elapsed.
 		"""
 
-		end_time 	 = time()
-		hours, rem   = divmod(end_time - start_time, 3600)
+		hours, rem   = divmod(self.finisher_seconds(start_time=start_time), 3600)
 		minutes, sec = divmod(rem, 60)
 
-		return (hours, minutes, sec)
\ No newline at end of file
+		return (hours, minutes, sec)
+
+
+	def finisher_seconds(self, start_time):
+		"""
+		Get the elapsed time as a single value.
+
+		:params start_time: The start time returned by starter.
+
+		:return: Seconds elapsed.
+		"""
+
+		return (perf_counter_ns() - start_time) * 1e-9
\ No newline at end of file
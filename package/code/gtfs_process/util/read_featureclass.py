@@ -0,0 +1,37 @@
+"""
+Author: Anastassios Dardas, PhD - Higher Education Specialist at Education & Research at Esri Canada.
+Date: Q3 - 2022
+
+About: Read shapefiles (feature classes) as spatial dataframes once per worker - routes processed by the same
+       worker that share a shapefile reuse the parsed copy instead of reading it again.
+"""
+
+from arcgis.features import GeoAccessor
+from functools import lru_cache
+from pandas import DataFrame
+import os
+
+
+@lru_cache(maxsize=64)
+def _load_featureclass(path, mtime) -> DataFrame:
+	"""
+	:param path: The path to the shapefile.
+	:param mtime: The last modified time of the shapefile - part of the cache key so a rewritten file is read again.
+
+	:return: Spatial dataframe of the shapefile.
+	"""
+
+	return GeoAccessor.from_featureclass(path)
+
+
+def read_featureclass(path) -> DataFrame:
+	"""
+	Read a shapefile as a spatial dataframe through the per-process cache.
+
+	:param path: The path to the shapefile.
+
+	:return: A copy of the cached spatial dataframe (callers are free to modify it).
+	"""
+
+	# os.path.getmtime raises OSError if the shapefile is missing - same as reading it.
+	return _load_featureclass(path, os.path.getmtime(path)).copy()
@@ -0,0 +1,97 @@
+"""
+Author: Anastassios Dardas, PhD - Higher Education Specialist at Education & Research at Esri Canada.
+Date: Q3 - 2022
+
+About: Publishes a read-only dataframe to shared memory (Arrow IPC stream) so that the workers of a parallel
+       process can attach to it instead of receiving a pickled copy with every task. Only worthwhile with the
+       "spawn" start method - "fork" already shares the parent's pages (copy-on-write).
+"""
+
+from multiprocessing import shared_memory
+from pandas import DataFrame
+import pyarrow as pa
+
+
+# Shared frames already attached in this (worker) process - name -> (shared memory block, dataframe).
+_attached = {}
+
+
+class SharedFrame:
+
+	def __init__(self, df: DataFrame):
+		"""
+		Serialize the dataframe as an Arrow IPC stream and copy it into a new shared memory block.
+		When pickled (e.g., via partial), only the name and size of the block are sent to the workers.
+
+		:param df: The read-only dataframe to share (e.g., stop_times).
+		"""
+
+		self.name, self.size = self._publish(df=df)
+
+
+	def _publish(self, df: DataFrame):
+		"""
+		:param df: The read-only dataframe to share.
+
+		:return: Tuple (0: Name of the shared memory block; 1: Size in bytes of the Arrow IPC stream).
+		"""
+
+		table = pa.Table.from_pandas(df)
+		sink  = pa.BufferOutputStream()
+
+		with pa.ipc.new_stream(sink, table.schema) as writer:
+			writer.write_table(table)
+
+		buf = sink.getvalue()
+
+		self._shm = shared_memory.SharedMemory(create=True, size=max(buf.size, 1))
+		self._shm.buf[:buf.size] = memoryview(buf)
+
+		return (self._shm.name, buf.size)
+
+
+	def __getstate__(self):
+		return {'name': self.name, 'size': self.size}
+
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self._shm = None
+
+
+	def frame(self) -> DataFrame:
+		"""
+		Attach to the shared memory block and rebuild the dataframe - once per process, then reused.
+
+		:return: The shared dataframe.
+		"""
+
+		if self.name not in _attached:
+			shm    = shared_memory.SharedMemory(name=self.name)
+			reader = pa.ipc.open_stream(pa.py_buffer(shm.buf[:self.size]))
+			_attached[self.name] = (shm, reader.read_all().to_pandas())
+
+		return _attached[self.name][1]
+
+
+	@staticmethod
+	def preload(*frames):
+		"""
+		Attach the shared frames up front - used as the initializer of the workers of a process pool,
+		so the tasks find the dataframes already rebuilt in the worker.
+
+		:param frames: SharedFrame(s) to attach.
+		"""
+
+		[sf.frame() for sf in frames]
+
+
+	def release(self):
+		"""
+		Free the shared memory block - called by the process that created it once the workers are done.
+		"""
+
+		if self._shm is not None:
+			self._shm.close()
+			self._shm.unlink()
+			self._shm = None
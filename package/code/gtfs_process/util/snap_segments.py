@@ -0,0 +1,68 @@
+"""
+Author: Anastassios Dardas, PhD - Higher Education Specialist at Education & Research at Esri Canada.
+Date: Q3 - 2022
+
+About: Snap points to the nearest of a set of line segments (planar) with NumPy - replaces snapping one ArcGIS Point
+       at a time to the Polyline of the transit route. Points are processed in blocks against all segments to bound memory.
+"""
+
+from numpy import arange, asarray, clip, concatenate, empty, float64, int64, where
+
+
+def path_segments(paths):
+	"""
+	Split the paths of a polyline (e.g., ArcGIS Polyline['paths']) into individual line segments.
+
+	:param paths: Nested list of paths - each path is a list of [x, y] vertices.
+
+	:return: Tuple of arrays (0: sx0; 1: sy0; 2: sx1; 3: sy1) - start and end coordinates of each segment.
+	"""
+
+	coords = [asarray(p, dtype=float64)[:, :2] for p in paths if len(p) > 1]
+	start  = concatenate([c[:-1] for c in coords])
+	end    = concatenate([c[1:] for c in coords])
+
+	return (start[:, 0], start[:, 1], end[:, 0], end[:, 1])
+
+
+def snap_points_to_segments(px, py, sx0, sy0, sx1, sy1, block=1 << 21):
+	"""
+	Project each point onto every segment, clamp to the segment's ends, and keep the closest projection.
+
+	:param px: Array of the x coordinates of the points (e.g., longitude).
+	:param py: Array of the y coordinates of the points (e.g., latitude).
+	:param sx0: Array of the x coordinates where each segment starts.
+	:param sy0: Array of the y coordinates where each segment starts.
+	:param sx1: Array of the x coordinates where each segment ends.
+	:param sy1: Array of the y coordinates where each segment ends.
+	:param block: Max. number of point-segment pairs evaluated at once.
+
+	:return: Tuple of arrays (0: seg_idx - index of the nearest segment; 1: proj_x; 2: proj_y - snapped coordinates).
+	"""
+
+	px, py = asarray(px, dtype=float64), asarray(py, dtype=float64)
+	dx, dy = sx1 - sx0, sy1 - sy0
+	len2   = dx * dx + dy * dy
+	len2   = where(len2 == 0, 1.0, len2) # Degenerate segment (repeated vertex) - projects onto its start.
+
+	seg_idx = empty(len(px), dtype=int64)
+	proj_x  = empty(len(px), dtype=float64)
+	proj_y  = empty(len(px), dtype=float64)
+
+	step = max(1, block // max(len(sx0), 1))
+	for i in range(0, len(px), step):
+		bx = px[i:i+step, None]
+		by = py[i:i+step, None]
+
+		t  = clip(((bx - sx0) * dx + (by - sy0) * dy) / len2, 0.0, 1.0)
+		qx = sx0 + t * dx
+		qy = sy0 + t * dy
+
+		k = ((bx - qx) ** 2 + (by - qy) ** 2).argmin(axis=1)
+		r = arange(len(k))
+
+		seg_idx[i:i+step] = k
+		proj_x[i:i+step]  = qx[r, k]
+		proj_y[i:i+step]  = qy[r, k]
+
+	return (seg_idx, proj_x, proj_y)
@@ -8,15 +8,19 @@ About: * Building paths by connection/travel type from the consecutive pair - HI
 	   * Calculate future distance travelled (2nd veh - in all connection types; 1st veh - ONLY in same stop type)
 """
 
-from .build_segs import PrepareSeg, BridgeVehRestSeg
+from .build_segs import PrepareSeg, SegLookup
 from .deltas import SpatialDelta
 from .universal_cal import CalcSemiDf
-from pandas import DataFrame, concat, json_normalize
+from itertools import chain
+from pandas import DataFrame
+from numpy import add, asarray, float64, unique
 
 
 class BtwnStps:
 
-	def __init__(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid):
+	__slots__ = ('btwn_info',) # Built once per consecutive pair - no per-instance __dict__.
+
+	def __init__(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid, seg_lookup=None):
 		"""
 		What happened between the 1st and 2nd veh of consec. pair - more than 1 transit stop has been passed and not recorded.
 		Draw paths:
@@ -45,12 +49,14 @@ class BtwnStps:
 		:param index2: The index value of the undissolved segment where the 2nd veh. is located.
 		:param undiss_df: The spatial dataframe of the undissolved polyline segment.
 		:param wkid: Spatial reference to project geometry paths.
+		:param seg_lookup: Optional SegLookup of the undiss_df (built once per transit route).
 		"""
 
 		self.btwn_info = self._btwn_stops(stp_seq=stp_seq, stp_seq2=stp_seq2,
 		                                  x1=x1, y1=y1, x2=x2, y2=y2,
 		                                  index=index, index2=index2,
-		                                  undiss_df=undiss_df, wkid=wkid)
+		                                  undiss_df=undiss_df, wkid=wkid,
+		                                  seg_lookup=seg_lookup)
 
 
 	def _build_multi_path(self, undiss_rte: DataFrame, wkid):
@@ -65,31 +71,28 @@ class BtwnStps:
 		:return: Tuple (0: Path in-between; 1: DataFrame built in-between).
 		"""
 
-		btwn_df = (
-			concat([json_normalize(undiss_rte['SHAPE']), undiss_rte.reset_index()], axis=1)
-				.assign(end_path=lambda d: d['paths'].apply(lambda e: e[0][-1]))
-			[['stop_seque', 'end_path']]
-		)
+		# One pass over the segments - last coord pair (end path) & length of each segment.
+		stp_seqs = undiss_rte['stop_seque'].tolist()
+		paths    = [shp['paths'] for shp in undiss_rte['SHAPE']]
+		ends     = [p[0][-1] for p in paths]
+		dists    = SpatialDelta.batch(paths_list=paths, wkid=wkid)
 
 		# Generate the appropriate geometry path for in-between.
 		# Used to inject between the first en-transit and second en-transit.
-		btwn_path = [[b] for b in btwn_df['end_path']]
-
-		btwn_dist = (
-			concat([json_normalize(undiss_rte['SHAPE']), undiss_rte.reset_index()], axis=1)
-			[['stop_seque', 'paths']]
-				.pipe(lambda d: d.assign(dist=[SpatialDelta(paths=path, wkid=wkid).dist for path in d['paths']]))
-				.groupby(['stop_seque'], as_index=False)
-				.apply(lambda e: e.assign(end_path=lambda d: d['paths'].apply(lambda f: f[0][-1])))
-				.groupby(['stop_seque'], as_index=False)
-				.agg({'end_path': lambda x: x.tolist(), 'dist': 'sum'})
-			[['stop_seque', 'end_path', 'dist']]
-		)
+		btwn_path = [[e] for e in ends]
+
+		# Per stop sequence - undiss_rte is ordered by stop sequence, so each one is a contiguous run of segments.
+		stp_keys, first = unique(stp_seqs, return_index=True)
+		bounds          = list(first) + [len(ends)]
+
+		btwn_dist = DataFrame({'stop_seque': stp_keys,
+		                       'end_path'  : [ends[bounds[k]:bounds[k + 1]] for k in range(len(first))],
+		                       'dist'      : add.reduceat(asarray(dists, dtype=float64), first) if len(first) > 0 else []})
 
 		return (btwn_path, btwn_dist)
 
 
-	def _btwn_stops(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid):
+	def _btwn_stops(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid, seg_lookup=None):
 		"""
 		See conclude section (~line 28) and param section (~line 38-47) for more details.
 
@@ -106,10 +109,13 @@ class BtwnStps:
 						2: Semifinal DataFrame; 3: Future distance to be traveled).
 		"""
 
+		if seg_lookup is None:
+			seg_lookup = SegLookup(undiss_df=undiss_df)
+
 		# Trace segment information - first and last
 		segs = PrepareSeg(x1=x1, y1=y1, stp_seq=stp_seq, index=index,
 		                  x2=x2, y2=y2, stp_seq2=stp_seq2, index2=index2,
-		                  undiss_df=undiss_df, wkid=wkid).traced_seg
+		                  undiss_df=undiss_df, wkid=wkid, seg_lookup=seg_lookup).traced_seg
 
 		build_segs    = segs[0] # List - Nested containing either [first_path, end_path] or [first_path].
 		consec_pths   = segs[1] # List - Path drawn for 1st veh. (forward) and 2nd veh. (backward)
@@ -117,19 +123,19 @@ class BtwnStps:
 		consec_stpseq = segs[3] # List - 1st veh en-transit stop seq. and 2nd veh. en-transit stop seq.
 		future_dist   = segs[4] # Future distance value
 
-		# Generate - stop range in between
-		stp_range = [r for r in range(int(stp_seq) + 1, int(stp_seq2))]
+		# Number of stops in between
+		n_btwn = int(stp_seq2) - int(stp_seq) - 1
 
 		# Get shape undissolved segments from the identified in-between stops from undissolved shapefile.
-		btwn_undiss_rte = undiss_df.query('stop_seque in @stp_range').sort_values(['stop_seque', 'index'])
+		btwn_undiss_rte = seg_lookup.stops_between(stp_seq, stp_seq2)
 
 		# Safety switch - if there is really nothing in the query but the stop range appears greater than or equal to 1
 		#                 then, it indicates likely data integrity issue in the GTFS static files - Compensate to adjust.
-		if len(btwn_undiss_rte) == 0 and len(stp_range) >= 1:
+		if len(btwn_undiss_rte) == 0 and n_btwn >= 1:
 
 			# Calculate distance travelled total
-			connect_seg = [ss for s in build_segs for ss in s]
-			dist        = SpatialDelta(paths=connect_seg, wkid=wkid).dist
+			connect_seg = list(chain.from_iterable(build_segs))
+			dist        = SpatialDelta.length(paths=connect_seg, wkid=wkid)
 
 			# Create Semi-final dataframe in preparation for data augmentation
 			robust_df = CalcSemiDf(consec_stpseq=consec_stpseq,
@@ -147,19 +153,22 @@ class BtwnStps:
 			# Between dataframe used to append with 1st and 2nd veh.
 			# aka the lists (consc_stpseq, consec_pths, consec_dist).
 			btwn_df       = btwn_stop_seg[1]
-			robust_df     = CalcSemiDf(consec_stpseq=consec_stpseq,
+			semi          = CalcSemiDf(consec_stpseq=consec_stpseq,
 			                           consec_pths=consec_pths,
 			                           consec_dist=consec_dist,
-			                           btwn_df=btwn_df).semi_df
+			                           btwn_df=btwn_df)
+			robust_df     = semi.semi_df
 
-			dist = robust_df['Tot_Dist'].iloc[0]
+			dist = semi.tot_dist
 
 			return ('In-Between', dist, robust_df, future_dist)
 
 
 class OneStp:
 
-	def __init__(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid):
+	__slots__ = ('one_info',)
+
+	def __init__(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid, seg_lookup=None):
 		"""
 		What happened between the 1st and 2nd veh of consec. pair - from a one-stop difference.
 		Draw paths:
@@ -187,15 +196,17 @@ class OneStp:
 		:param index2: The index value of the undissolved segment where the 2nd veh. is located.
 		:param undiss_df: The spatial dataframe of the undissolved polyline segment.
 		:param wkid: Spatial reference to project geometry paths.
+		:param seg_lookup: Optional SegLookup of the undiss_df (built once per transit route).
 		"""
 
 		self.one_info = self._onestop(stp_seq=stp_seq, stp_seq2=stp_seq2,
 					      			  x1=x1, y1=y1, x2=x2, y2=y2,
 									  index=index, index2=index2,
-									  undiss_df=undiss_df, wkid=wkid)
+									  undiss_df=undiss_df, wkid=wkid,
+									  seg_lookup=seg_lookup)
 
 
-	def _onestop(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid):
+	def _onestop(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid, seg_lookup=None):
 		"""
 		See conclude section (~line 170) and param section (~line 180-189) for more details.
 
@@ -212,7 +223,7 @@ class OneStp:
 		# Trace segment information - first and last
 		segs = PrepareSeg(x1=x1, y1=y1, stp_seq=stp_seq, index=index,
 		                  x2=x2, y2=y2, stp_seq2=stp_seq2, index2=index2,
-		                  undiss_df=undiss_df, wkid=wkid).traced_seg
+		                  undiss_df=undiss_df, wkid=wkid, seg_lookup=seg_lookup).traced_seg
 
 		build_segs    = segs[0] # List - Nested containing either [first_path, end_path] or [first_path].
 		consec_pths   = segs[1] # List - Path drawn for 1st veh. (forward) and 2nd veh. (backward).
@@ -220,8 +231,8 @@ class OneStp:
 		consec_stpseq = segs[3] # List - 1st veh. en-transit stop seq. and 2nd veh. en-transit stop seq.
 		future_dist   = segs[4] # List - Future distance value (2nd veh. -> stop seq.).
 
-		connect_seg = [ss for s in build_segs for ss in s] # Reformat the connecting segments start (1st) to end (2nd).
-		dist        = SpatialDelta(paths=connect_seg, wkid=wkid).dist # Acquire the total distance travelled.
+		connect_seg = list(chain.from_iterable(build_segs)) # Reformat the connecting segments start (1st) to end (2nd).
+		dist        = SpatialDelta.length(paths=connect_seg, wkid=wkid) # Acquire the total distance travelled.
 
 		# Create Semi-final dataframe in preparation for data augmentation
 		robust_df = CalcSemiDf(consec_stpseq=consec_stpseq,
@@ -234,7 +245,9 @@ class OneStp:
 
 class SameStp:
 
-	def __init__(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid, conx_type):
+	__slots__ = ('same_info',)
+
+	def __init__(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid, conx_type, seg_lookup=None):
 		"""
 		What happened between the 1st and 2nd veh of consec. pair - from the same stop (no real difference).
 		Draw paths:
@@ -267,46 +280,56 @@ class SameStp:
 		:param undiss_df: The spatial dataframe of the undissolved polyline segment.
 		:param wkid: Spatial reference to project geometry paths.
 		:param conx_type: The connection type: Same Stop - Different Segment; Same Stop - Same Segment
+		:param seg_lookup: Optional SegLookup of the undiss_df (built once per transit route).
 		"""
 
+		if seg_lookup is None:
+			seg_lookup = SegLookup(undiss_df=undiss_df)
+
 		self.same_info = self._samestp(stp_seq=stp_seq, stp_seq2=stp_seq2,
 		                               x1=x1, y1=y1, x2=x2, y2=y2,
 		                               index=index, index2=index2,
-		                               undiss_df=undiss_df, wkid=wkid,
+		                               seg_lookup=seg_lookup, wkid=wkid,
 		                               conx_type=conx_type)
 
 
-	def _futureseg(self, stp_seq2, index2, dist, veh_loc_2nd, undiss_df: DataFrame, wkid):
+	def _futureseg(self, stp_seq2, index2, dist, veh_loc_2nd, seg_lookup: SegLookup, wkid):
 		"""
 		Estimates future distance required to travel for both 1st veh and 2nd veh. individually.
 
 		Dependent Classes:
-			1) BridgeVehRestSeg --> Build paths (1st veh. --> nth segment --> nth segment --> 2nd veh.; 1st veh --> 2nd veh)
+			1) SegLookup        --> Build paths (1st veh. --> nth segment --> nth segment --> 2nd veh.; 1st veh --> 2nd veh)
 			2) SpatialDelta     --> Build Geometry Polyline (ArcGIS) & acquire length (aka distance).
 
 		:param stp_seq2: Stop sequence of the 2nd veh. from consecutive pair.
 		:param index2: The index value of the undissolved segment where the 2nd veh. is located.
 		:param dist: Distance travelled either from 1st veh --> nth segment --> 2nd veh OR 1st veh --> 2nd veh.
 		:param veh_loc_2nd: Nested x,y snapped coordinate list of the 2nd veh. to build future segment paths.
-		:param undiss_df: The spatial datafram of the undissolved polyline segment.
+		:param seg_lookup: SegLookup of the undissolved polyline segments.
 		:param wkid: Spatial reference to project geometry paths.
 
 		:return: List (0: Future distance from the 2nd veh. OR None if not applicable; 1: Future distance from the 1st veh.)
 		"""
 
-		query = f"stop_seque == @stp_seq2 and index == @index2"
-		queried_reslt = undiss_df.query(query)
-		fut_seg = queried_reslt['SHAPE'].iloc[0]['paths'][0][-1]
+		# Future distance of the 2nd veh. only depends on where it is - reused while it dwells (same route).
+		key = (stp_seq2, index2, veh_loc_2nd[0], veh_loc_2nd[1], wkid)
+		if key not in seg_lookup.future:
+			fut_seg = seg_lookup.ends(stp_seq2, index2)[1]
+
+			future_remain = seg_lookup.rest_seg(stp_seq2, index2, ">")
+
+			if len(future_remain) >= 1:
+				future_seg      = [veh_loc_2nd, fut_seg]
+				future_end_path = [future_seg, future_remain]
+				seg_lookup.future[key] = SpatialDelta.length(paths=future_end_path, wkid=wkid)
 
-		query = f"stop_seque == @stp_seq2 and index > @index2"
-		filt_undiss = undiss_df.query(query)
+			else:
+				seg_lookup.future[key] = None
+
+		future_dist = seg_lookup.future[key]
 
 		# Get future distance from 2nd veh. and then add it to the 1st veh.
-		if len(filt_undiss) >= 1:
-			future_seg      = [veh_loc_2nd, fut_seg]
-			future_remain   = BridgeVehRestSeg(filt_undiss=filt_undiss).rest_seg
-			future_end_path = [future_seg, future_remain]
-			future_dist     = SpatialDelta(paths=future_end_path, wkid=wkid).dist
+		if future_dist is not None:
 			# Add future dist from the 2nd veh and dist (1st veh --> 2nd veh.) to get total future distance travel from 1st veh.
 			first_dist      = future_dist + dist
 
@@ -316,14 +339,14 @@ class SameStp:
 			return [None, dist]
 
 
-	def _samestp(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, undiss_df: DataFrame, wkid, conx_type):
+	def _samestp(self, stp_seq, stp_seq2, x1, y1, x2, y2, index, index2, seg_lookup: SegLookup, wkid, conx_type):
 		"""
 		See conclude section (~line 248) and param section (~line 259-269) for more details.
 
 		Dependent function(s): _futureseg
 
 		Dependent Classes:
-			1) BridgeVehRestSeg --> Build paths (1st veh. --> nth segment --> nth segment --> 2nd veh.; 1st veh --> 2nd veh)
+			1) SegLookup        --> Build paths (1st veh. --> nth segment --> nth segment --> 2nd veh.; 1st veh --> 2nd veh)
 			2) SpatialDelta     --> Build Geometry Polyline (ArcGIS) & acquire length (aka distance).
 			3) CalcSemiDf       --> Build the dataframe (schema: stop_seque, end_paths, dist, tot_dist)
 								    in preparation for data augmentation.
@@ -336,7 +359,7 @@ class SameStp:
 		:param y2: Snapped y-coordinate (latitude) of the 2nd veh.
 		:param index: The index value of the undissolved segment where the 1st veh. is located.
 		:param index2: The index value of the undissolved segment where the 2nd veh. is located.
-		:param undiss_df: The spatial dataframe of the undissolved polyline segment.
+		:param seg_lookup: SegLookup of the undissolved polyline segments.
 		:param wkid: Spatial reference to project geometry paths.
 		:param conx_type: The connection type: Same Stop - Different Segment; Same Stop - Same Segment
 
@@ -352,39 +375,35 @@ class SameStp:
 		if (conx_type == "Same Stop - Different Segment") or (conx_type == "Terminus - Different Segment"): # 1st veh --> nth segment --> nth segment --> 2nd veh
 			# Build 1st segment - first
 			# Get the segment coordinates of which the 1st vehicle is snapped on to connect.
-			query = f"stop_seque == @stp_seq and index == @index"
 			# Get the last coord pair (after) of the undissolved segment
-			fst_seg = undiss_df.query(query)['SHAPE'].iloc[0]['paths'][0][-1]
+			fst_seg = seg_lookup.ends(stp_seq, index)[1]
 			build_1st_seg = [[veh_loc_1st, fst_seg]]
 
 			# Build 2nd segment - end
-			query = f"stop_seque == @stp_seq2 and index == @index2"
 			# Get the first coord pair (before) of the undissolved segment
-			scd_seg = undiss_df.query(query)['SHAPE'].iloc[0]['paths'][0][0]
+			scd_seg = seg_lookup.ends(stp_seq2, index2)[0]
 			build_2nd_seg = [scd_seg, veh_loc_2nd]
 
 			# Build segments in-between first and end - multiple segments (> 1)
-			query = f"stop_seque == @stp_seq2 and (@index < index < @index2)"
-			filt_undiss = undiss_df.query(query)
-			if len(filt_undiss) >= 1:
-				btwn_remain = BridgeVehRestSeg(filt_undiss=filt_undiss).rest_seg
+			btwn_remain = seg_lookup.rest_seg(stp_seq2, (index, index2), "<>")
+			if len(btwn_remain) >= 1:
 				end_path    = [btwn_remain, build_2nd_seg]
 
 
-				frst_dist   = SpatialDelta(paths=build_1st_seg, wkid=wkid).dist # Dist for 1st veh --> segment (forward)
-				end_dist    = SpatialDelta(paths=end_path, wkid=wkid).dist # Dist for nth segment --> 2nd veh. (reverse)
+				# Dist for 1st veh --> segment (forward) & dist for nth segment --> 2nd veh. (reverse)
+				frst_dist, end_dist = SpatialDelta.batch(paths_list=[build_1st_seg, end_path], wkid=wkid)
 				dist        = frst_dist + end_dist # Total distance travelled (1st veh --> nth segment --> 2nd veh.)
 				consec_dist = [dist, 0] # 0 is placed because the 2nd veh is still in the same en-transit stop seq as 1st.
 
 				# To append to DataFrame - consistency purposes
-				beg_seg_match = [ss for s in build_1st_seg for ss in s]
-				end_seg_match = [ss for s in end_path for ss in s]
+				beg_seg_match = list(chain.from_iterable(build_1st_seg))
+				end_seg_match = list(chain.from_iterable(end_path))
 				consec_pths   = [beg_seg_match, end_seg_match]
 
 			# Connect segments directly if one or less segment of a difference: 1st veh --> 2nd veh
 			else:
 				build_seg   = [[veh_loc_1st, fst_seg], build_2nd_seg]
-				dist        = SpatialDelta(paths=build_seg, wkid=wkid).dist # Distance travelled 1st veh --> 2nd veh.
+				dist        = SpatialDelta.length(paths=build_seg, wkid=wkid) # Distance travelled 1st veh --> 2nd veh.
 				consec_dist = [dist, 0]
 				consec_pths = build_seg
 
@@ -397,7 +416,7 @@ class SameStp:
 			                           index2=index2,
 			                           dist=dist,
 			                           veh_loc_2nd=veh_loc_2nd,
-			                           undiss_df=undiss_df,
+			                           seg_lookup=seg_lookup,
 			                           wkid=wkid)
 
 			future_dist = futr_inf[0]
@@ -411,7 +430,7 @@ class SameStp:
 			build_1st_seg = [veh_loc_1st, veh_loc_2nd]
 
 			# Get distance between the two
-			dist = SpatialDelta(paths=[build_1st_seg], wkid=wkid).dist
+			dist = SpatialDelta.between(x1, y1, x2, y2, wkid=wkid)
 			consec_dist = [dist, 0]
 			consec_pths = [build_1st_seg, build_1st_seg]
 
@@ -424,7 +443,7 @@ class SameStp:
 				                        index2=index2,
 			                            dist=dist,
 			                            veh_loc_2nd=veh_loc_2nd,
-			                            undiss_df=undiss_df,
+			                            seg_lookup=seg_lookup,
 			                            wkid=wkid)
 
 			future_dist = futre_inf[0]
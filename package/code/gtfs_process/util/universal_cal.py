@@ -15,14 +15,60 @@ About: 3 Classes with their own unique purpose.
        c) RefineDf -
 """
 
-from pandas import DataFrame, concat
+from pandas import DataFrame, Series, to_numeric
+from numpy import asarray, concatenate, cumsum, empty, float64, isnan, nan, nansum, rint, select
+from functools import lru_cache
 from typing import List
 from .deltas import TimeDelta
 import datetime as dt
 
 
+# Output schema of CalcEnhanceDf (in order) - a list, as a tuple would be read as one column key.
+KEEP_COL = ['trip_id', 'idx', 'stop_id', 'stop_seque', 'status', 'proj_speed', 'x', 'y', 'Tot_Dist', 'dist',
+            'dist_futr', 'futr_trvel', 'proj_trvel', 'curr_time', 'est_arr', 'off_earr', 'tmp_arr',
+            'sched_arr', 'arr_tmedif', 'off_arrdif', 'perc_chge', 'perf_rate', 'dept_time', 'end_path']
+
+
+@lru_cache(maxsize=8192)
+def _parse_ts(timestamp):
+	"""
+	Parse a recorded timestamp - the same ones (local_time / time_shift) come back for every consecutive pair.
+
+	:param timestamp: Timestamp formatted: 'YYYY-mm-DD HH:MM:SS'
+
+	:return: datetime.datetime
+	"""
+
+	return dt.datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
+
+
+def _pair_fill(n, first, mid, last, dtype=object):
+	"""
+	Pre-sized column for the rows of a consecutive pair - the 1st veh., the in-between rows (mid) and the 2nd veh.
+
+	:param n: Number of rows (at least 2).
+	:param first: Value of the 1st veh.
+	:param mid: Value repeated in-between.
+	:param last: Value of the 2nd veh.
+	:param dtype: Array dtype - for float64, None is stored as NaN.
+
+	:return: NumPy array.
+	"""
+
+	if dtype is not object:
+		first, mid, last = (nan if v is None else v for v in (first, mid, last))
+
+	col       = empty(n, dtype=dtype)
+	col[0]    = first
+	col[1:-1] = mid
+	col[-1]   = last
+	return col
+
+
 class CalcSemiDf:
 
+	__slots__ = ('semi_df', 'tot_dist')
+
 	def __init__(self, consec_stpseq: List, consec_pths: List, consec_dist: List, btwn_df: DataFrame):
 		"""
 		Concatenates the 1st and 2nd consecutive veh. with dataframe that happened in-between (only mult-stop).
@@ -32,50 +78,61 @@ class CalcSemiDf:
 		:param consec_dist: A list containing the list travelled from the 1st veh to its stop sequence and the 2nd veh travelled past from its previous stop sequence (reverse).
 		:param btwn_df: If applicable (in-between stops classifier), the dataframe of the stops in-between 1st & 2nd veh; Schema: stop_seque, end_path, dist.
 
-		:returns: Semi-final dataframe with the following schema: stop_seque, end_path, dist, and Tot_Dist (total distance covered).
+		:returns: Semi-final dataframe (self.semi_df) with the following schema: stop_seque, end_path, dist, and Tot_Dist
+		          (total distance covered - also kept as self.tot_dist).
 		"""
 
-		self.semi_df = self._enhance_semi_df(consec_stpseq=consec_stpseq,
-		                                     consec_pths=consec_pths,
-		                                     consec_dist=consec_dist,
-		                                     btwn_df=btwn_df)
+		self.semi_df, self.tot_dist = self._enhance_semi_df(consec_stpseq=consec_stpseq,
+		                                                    consec_pths=consec_pths,
+		                                                    consec_dist=consec_dist,
+		                                                    btwn_df=btwn_df)
 
 
 	def _enhance_semi_df(self, consec_stpseq, consec_pths, consec_dist, btwn_df):
 		"""
+		Rows are gathered as plain lists, ordered by stop sequence and built into a dataframe once. When the consecutive
+		pair brackets the (ascending) in-between stops, those are placed in the middle directly - no sort needed.
+
 		:param consec_stpseq: A list containing the first and last stop sequence of the consecutive pair.
 		:param consec_pths: A list containing the drawn paths from the 1st veh to its stop sequence (forward) and the 2nd veh past from its previous stop sequence (reverse).
 		:param consec_dist: A list containing the list travelled from the 1st veh to its stop sequence and the 2nd veh travelled past from its previous stop sequence (reverse).
 		:param btwn_df: If applicable (in-between stops classifier), the dataframe of the stops in-between 1st & 2nd veh; Schema: stop_seque, end_path, dist.
-		:return: Semi-final dataframe.
+		:return: Tuple (0: Semi-final dataframe; 1: Total distance covered).
 		"""
 
-		# If in-between dataframe exists - otherwise proceed to else.
-		if btwn_df is not None:
+		stp_seqs = list(consec_stpseq)
+		paths    = list(consec_pths)
+		dists    = list(consec_dist) if isinstance(consec_dist, (list, tuple)) else [consec_dist] * len(stp_seqs)
+		labels   = list(range(len(stp_seqs)))
 
-			tmp_df = DataFrame({'stop_seque': consec_stpseq,
-			                    'end_path': consec_pths,
-			                    'dist'    : consec_dist})
+		# If in-between dataframe exists - its rows go between the consecutive pair, or after it (same as concat) to be sorted.
+		if btwn_df is not None and len(btwn_df) > 0:
+			btwn_seqs = btwn_df['stop_seque'].tolist()
+			btwn_cols = (btwn_seqs, btwn_df['end_path'].tolist(), btwn_df['dist'].tolist(), btwn_df.index.tolist())
 
-			robust_df = (
-				concat([tmp_df, btwn_df])
-					.sort_values(['stop_seque'])
-					.pipe(lambda d: d.assign(Tot_Dist = d['dist'].sum()))
-			)
+			bracketed = (len(stp_seqs) == 2 and stp_seqs[0] <= btwn_seqs[0] and btwn_seqs[-1] < stp_seqs[1]
+			             and btwn_df['stop_seque'].is_monotonic_increasing)
 
-			return robust_df
+			if bracketed:
+				stp_seqs, paths, dists, labels = ([col[0], *btwn, col[1]] for col, btwn in zip((stp_seqs, paths, dists, labels), btwn_cols))
+			else:
+				for col, btwn in zip((stp_seqs, paths, dists, labels), btwn_cols):
+					col += btwn
 
-		else:
+		tot_dist = float(nansum(asarray(dists, dtype=float64)))
 
-			tmp_df = (
-				DataFrame({'stop_seque' : consec_stpseq,
-		                   'end_path'   : consec_pths,
-		                   'dist'       : consec_dist})
-					.sort_values(['stop_seque'])
-					.pipe(lambda d: d.assign(Tot_Dist = d['dist'].sum()))
-			)
+		# Stable sort by stop sequence - only if the rows are not already in order.
+		if any(prev > nxt for prev, nxt in zip(stp_seqs, stp_seqs[1:])):
+			order = sorted(range(len(stp_seqs)), key=stp_seqs.__getitem__)
+			stp_seqs, paths, dists, labels = ([col[i] for i in order] for col in (stp_seqs, paths, dists, labels))
+
+		robust_df = DataFrame({'stop_seque': stp_seqs,
+		                       'end_path'  : paths,
+		                       'dist'      : dists,
+		                       'Tot_Dist'  : tot_dist},
+		                      index=labels)
 
-			return tmp_df
+		return (robust_df, tot_dist)
 
 
 class CalcEnhanceDf:
@@ -94,7 +151,8 @@ class CalcEnhanceDf:
 		:param local_time: The timestamp recorded from the 1st veh.
 		:param time_shift: The timestamp recorded from the 2nd veh.
 		:param future_dist: The distance that will need to be travelled in the near-future for the 2nd veh.
-		:param stop_times: Static GTFS file with scheduled/expected arrival_time and departure time for each stop per trip_id.
+		:param stop_times: Static GTFS file with scheduled/expected arrival_time and departure time for each stop per trip_id
+		                   (indexed by trip_id for a direct lookup, or trip_id as a column).
 		:param idx: The index - determining the number of vehicle movement in the consecutive group.
 		:param x1: Snapped x-coordinate of the 1st vehicle.
 		:param y1: Snapped y-coordinate of the 1st vehicle.
@@ -131,30 +189,28 @@ class CalcEnhanceDf:
 		:return: New timestamp - formatted: 'YYYY-mm-DD HH:MM:SS'
 		"""
 
-		return str(dt.datetime.strptime(tmp_curr_time, '%Y-%m-%d %H:%M:%S') + dt.timedelta(0, proj_trvel))
+		return str(_parse_ts(tmp_curr_time) + dt.timedelta(0, proj_trvel))
 
 
-	def _estTime(self, curr_time, proj_trvel, btwn_df):
+	def _estTime(self, curr_time, proj_trvel, btwn_trvel):
 		"""
-		Iteratively & cumulatively estimate the arrival time for each observation in the group, except last.
-
-		Dependent function(s): _addTime
+		Cumulatively estimate the arrival time for each observation in the group, except last - the current timestamp is
+		parsed once and the projected travel times are summed (microseconds, as datetime.timedelta rounds) to offset it.
 
 		:param curr_time: Current timestamp - starting with the 1st veh.
 		:param proj_trvel: Estimated travel time - starting with the 1st veh.
-		:param btwn_df: In-between dataframe (between 1st and 2nd veh.) to assess estimated travel time.
+		:param btwn_trvel: Array of the estimated travel times in-between (between 1st and 2nd veh.).
 
-		:return: A list with estimated arrival time for each observation in the group, except last - set as None.
+		:return: A list with estimated arrival time for each observation in the group, except last - set as None. Set as
+		         None from the first missing travel time onwards (it cannot be accumulated further).
 		"""
 
-		frst_esttime = self._addTime(tmp_curr_time=curr_time, proj_trvel=proj_trvel)
-		idx_esttime  = frst_esttime # Variable used to switch values and calculate estimated arrival time.
+		start_time = _parse_ts(curr_time)
+		trvel_time = concatenate(([proj_trvel], btwn_trvel)).astype(float64)  # 1st veh. then in-between including one-stoppers
+		offsets    = cumsum(rint(trvel_time * 1e6))  # NaN carries over to the rest of the sum.
+		missing    = isnan(offsets)
 
-		est_time = [frst_esttime]  # Add estimate arrival time for first observation
-		for tmp_time in btwn_df['proj_trvel']:  # In-between including one-stoppers
-			tmp_esttime = self._addTime(tmp_curr_time=idx_esttime, proj_trvel=tmp_time)
-			idx_esttime = tmp_esttime
-			est_time.append(tmp_esttime)
+		est_time = [None if miss else str(start_time + dt.timedelta(microseconds=int(offset))) for offset, miss in zip(offsets, missing)]
 
 		est_time.append(None)  # Add None for the last observation b/c distance to its stop sequence is not calculated in this instance.
 
@@ -163,21 +219,16 @@ class CalcEnhanceDf:
 
 	def _classifyOnTime(self, value):
 		"""
-		Classifies each observation if it is late, on-time, or early.
+		Classifies each observation if it is late, on-time, or early - the whole column at once.
 
-		:param value: Individual value (seconds) from off_arrdif.
+		:param value: The values (seconds) from off_arrdif.
 
-		:return: Str value that classified on-time performance.
+		:return: Array of str values that classified on-time performance (None if the value is missing).
 		"""
 
-		if value <= -120:
-			return "Late"
+		arr = to_numeric(value, errors='coerce').to_numpy(dtype=float64)
 
-		elif -120 < value < 300:
-			return "On-Time"
-
-		elif value >= 300:
-			return "Early"
+		return select([arr <= -120, (arr > -120) & (arr < 300), arr >= 300], ["Late", "On-Time", "Early"], default=None)
 
 
 	def _perfChange(self, value, value2):
@@ -186,26 +237,20 @@ class CalcEnhanceDf:
 		Abrupt changes could possibly indicate traffic incident or surge in passenger boardings / alightings or
 		speeding up to catch up with their next transit stops. These may happen over space-time broadly.
 
-		:param value: Individual value from off_arrdif.
-		:param value2: 2nd individual value (shift -1) from off_arrdif.
+		:param value: The values from off_arrdif.
+		:param value2: The values (shift -1) from off_arrdif.
 
-		:return: Percentage value.
+		:return: Series of percentage values (NaN where value is missing or zero).
 		"""
 
-		try:
-			change      = value2 - value
-			perf_change = round((change / value)*100, 2)
+		value  = to_numeric(value, errors='coerce')
+		value2 = to_numeric(value2, errors='coerce')
 
-			# if value2 is greater than value and the performance change is less than zero - turn to positive.
-			# Indicate improvement
-			if (value < value2) and (perf_change < 0):
-				return -perf_change
+		perf_change = ((value2 - value) / value.replace(0, nan) * 100).round(2)
 
-			else:
-				return perf_change
-
-		except Exception as e:
-			return None
+		# if value2 is greater than value and the performance change is less than zero - turn to positive.
+		# Indicate improvement
+		return perf_change.where(~((value < value2) & (perf_change < 0)), -perf_change)
 
 
 	def _enhance_final_df(self, semi_final_df: DataFrame, trip_id, proj_speed, status, stat_shift, mid_stat,
@@ -225,7 +270,8 @@ class CalcEnhanceDf:
 		:param local_time: The timestamp recorded from the 1st veh.
 		:param time_shift: The timestamp recorded from the 2nd veh.
 		:param future_dist: The distance that will need to be travelled in the near-future for the 2nd veh.
-		:param stop_times: Static GTFS file with scheduled/expected arrival_time and departure time for each stop per trip_id.
+		:param stop_times: Static GTFS file with scheduled/expected arrival_time and departure time for each stop per trip_id
+		                   (indexed by trip_id for a direct lookup, or trip_id as a column).
 		:param idx: The recorded movement indicator.
 		:param x1: Snapped x-coordinate of the 1st vehicle.
 		:param y1: Snapped y-coordinate of the 1st vehicle.
@@ -260,16 +306,20 @@ class CalcEnhanceDf:
 					end_path   = The linestring paths (nested coordinates) that can be drawn out spatially if required.
 		"""
 
-		# Query by trip_id in the stop_times GTFS static file (improve efficiency) - acquire scheduled/expected arrival_time and departure_time
-		sub_stp_time_df = stop_times.query('trip_id == @trip_id')
+		# Look up the trip_id in the stop_times GTFS static file - acquire scheduled/expected arrival_time and departure_time
+		if 'trip_id' in stop_times.columns:
+			sub_stp_time_df = stop_times.query('trip_id == @trip_id')
+		elif trip_id in stop_times.index:
+			sub_stp_time_df = stop_times.loc[[trip_id]].reset_index()
+		else:
+			sub_stp_time_df = stop_times.iloc[0:0].reset_index()
 
-		keep_col = ['trip_id', 'idx', 'stop_id', 'stop_seque', 'status', 'proj_speed', 'x', 'y', 'Tot_Dist', 'dist',
-		            'dist_futr', 'futr_trvel', 'proj_trvel', 'curr_time', 'est_arr', 'off_earr', 'tmp_arr',
-				    'sched_arr', 'arr_tmedif', 'off_arrdif', 'perc_chge', 'perf_rate', 'dept_time', 'end_path']
+		# The trip's schedule keyed by stop sequence - joined onto the rows of the pair (trip_id is the same on both sides).
+		schedule = sub_stp_time_df.drop(columns='trip_id').set_index('stop_seque')
 
 		if travel_type == "Multiple Stops" or travel_type == "One Stop":
-			# Repeat the number of times in between the status. Exclude beginning and end; hence subtract by 2
-			repeat_mid = len(semi_final_df) - 2
+			# Number of rows - the in-between ones exclude beginning and end.
+			n_rows = len(semi_final_df)
 
 			# Project travel time for the future - after the 2nd vehicle based on current projected speed and distance need to travel.
 			future_trvel = [round(((future_dist / 1000) / proj_speed) * 3600) if future_dist is not None else None][0]
@@ -277,18 +327,25 @@ class CalcEnhanceDf:
 			# Estimate arrival time at the end of destination of its current stop sequence - for the 2nd vehicle.
 			future_arr   = [self._addTime(tmp_curr_time=time_shift, proj_trvel=future_trvel) if future_trvel is not None else None][0]
 
-			# Pre-build the dataframe as lists:
+			# Pre-build the dataframe columns as arrays (idx is the same for every row):
 			# movement status, current time (recorded), distance required to complete (applies only 2nd veh.), and future projected travel time.
-			order_stat = [status] + repeat_mid * [mid_stat] + [stat_shift]
-			curr_time  = [local_time] + repeat_mid * [None] + [time_shift]
-			dist_futr  = [None] + repeat_mid * [None] + [future_dist]
-			future_lst = [None] + repeat_mid * [None] + [future_trvel]
-			idx        = [idx] + repeat_mid * [idx] + [idx]
-			x          = [x1] + repeat_mid * [None] + [x2]
-			y          = [y1] + repeat_mid * [None] + [y2]
-
-			# Build the dataframe and merge with the queried stop_times.
-			fin_df = (
+			order_stat = _pair_fill(n_rows, status, mid_stat, stat_shift)
+			curr_time  = _pair_fill(n_rows, local_time, None, time_shift)
+			dist_futr  = _pair_fill(n_rows, None, None, future_dist, dtype=float64)
+			future_lst = _pair_fill(n_rows, None, None, future_trvel, dtype=float64)
+			x          = _pair_fill(n_rows, x1, None, x2, dtype=float64)
+			y          = _pair_fill(n_rows, y1, None, y2, dtype=float64)
+
+			def off_arrdif(d):
+				# From first to second last observation during consecutive pair - then the time difference from estimated
+				# arrival time and scheduled arrival time for the 2nd veh. loc.
+				# The official estimate of the 2nd veh. loc. is future_arr (the last off_earr) - no need to read it back.
+				last_sched_arr   = d['sched_arr'].iloc[-1]
+				last_off_tme_dif = TimeDelta(future_arr, last_sched_arr).change_time if (future_arr is not None and last_sched_arr is not None) else None
+				return d['arr_tmedif'].iloc[:-1].tolist() + [last_off_tme_dif]
+
+			# Build the dataframe, join with the trip's schedule and derive the rest in one assign (evaluated in order).
+			final_df = (
 				semi_final_df
 					.assign(trip_id    = trip_id,
                             idx        = idx,
@@ -296,50 +353,26 @@ class CalcEnhanceDf:
                             y          = y,
 				            curr_time  = curr_time,
 				            proj_speed = proj_speed,
-				            proj_trvel = lambda d: round(((d['dist'] / 1000) / proj_speed) * 3600), # Get projected travel time in seconds
+				            proj_trvel = lambda d: rint(d['dist'].to_numpy(dtype=float64) * (3.6 / proj_speed)), # Get projected travel time in seconds - (dist / 1000) / speed * 3600
 				            status     = order_stat,
 				            dist_futr  = dist_futr,
 				            futr_trvel = future_lst)
-					.merge(sub_stp_time_df, on=['trip_id', 'stop_seque'])
-			)
-
-			## Prepare to calculate iteratively - estimated arrival time
-			frst_proj_trvel = fin_df['proj_trvel'].iloc[0]  # Get the first projected travel time (sec.) - aka 1st veh.
-			frst_curr_time  = fin_df['curr_time'].iloc[0]  # Get the recorded time of the 1st veh. (consecutive pair)
-			btwn_df         = fin_df.iloc[1:-1]  # Get only in-between to assess estimate time - exclude 1st and last observation
-			est_time_list   = self._estTime(curr_time=frst_curr_time,
-			                                proj_trvel=frst_proj_trvel,
-			                                btwn_df=btwn_df)
-
-			# Build the final dataframe
-			final_df = (
-				fin_df
-					.assign(est_arr    = est_time_list,  # Estimated arrival time
-				            draft_date = lambda d: d['est_arr'].str.split(" ").str[0],
+					.join(schedule, on='stop_seque', how='inner')
+					# Estimated arrival time - cumulative from the 1st veh. (recorded time & projected travel) over the in-between.
+					.assign(est_arr    = lambda d: self._estTime(curr_time=d['curr_time'].iloc[0],
+				                                                 proj_trvel=d['proj_trvel'].iloc[0],
+				                                                 btwn_trvel=d['proj_trvel'].to_numpy()[1:-1]),
+				            draft_date = lambda d: d['est_arr'].str.slice(0, 10),
 				            sched_arr  = lambda d: d['draft_date'].iloc[0] + " " + d['arrival_time'],
 				            tmp_arr    = lambda d: d['draft_date'] + " " + d['arrival_time'],           # Combine day with hour and second (e.g., 2021-09-30 13:40:30)
 				            # The arrival time difference - comparison between estimated arrival time and expected arrival time
-				            arr_tmedif = lambda d: d[['est_arr', 'tmp_arr']].apply(lambda r: TimeDelta(*r).change_time, axis=1),
-				            off_earr   = est_time_list[0:-1] + [future_arr]) # Official estimated arrival_time including the 2nd veh. loc
-			)
-
-			## Prepare to calculate the time difference from estimated arrival time and scheduled arrival time for the 2nd veh. loc.
-			last_off_est_arr = final_df['off_earr'].iloc[-1]
-			last_sched_arr   = final_df['sched_arr'].iloc[-1]
-			arr_tme_dif      = list(final_df['arr_tmedif'])[0:-1] # From first to second last observation during consecutive pair.
-			last_off_tme_dif = [TimeDelta(last_off_est_arr, last_sched_arr).change_time if (last_sched_arr and last_sched_arr) is not None else None][0]
-			off_tme_dif      = arr_tme_dif + [last_off_tme_dif]
-
-			## Finalize the interpolated dataframe and return
-			final_df = (
-				final_df
-					.assign(off_arrdif       = off_tme_dif,  # Assign official time difference in all observations - determine what is late, on-time, early
-							off_arrdif_shift = lambda d: d['off_arrdif'].shift(-1),
-	                        tmp_change       = lambda d: d[['off_arrdif', 'off_arrdif_shift']].apply(lambda e: self._perfChange(*e), axis=1),
-	                        perc_chge        = lambda d: d['tmp_change'].shift(1),
-	                        perf_rate        = lambda d: d['off_arrdif'].apply(lambda e: self._classifyOnTime(e)))
-					.rename(columns = {'departure_time' : 'dept_time'})
-				[keep_col]
+				            arr_tmedif = lambda d: TimeDelta.vectorized(d['est_arr'], d['tmp_arr']),
+				            off_earr   = lambda d: d['est_arr'].iloc[:-1].tolist() + [future_arr], # Official estimated arrival_time including the 2nd veh. loc
+				            off_arrdif = off_arrdif,  # Assign official time difference in all observations - determine what is late, on-time, early
+				            perc_chge  = lambda d: self._perfChange(d['off_arrdif'], d['off_arrdif'].shift(-1)).shift(1),
+				            perf_rate  = lambda d: self._classifyOnTime(d['off_arrdif']),
+				            dept_time  = lambda d: d['departure_time'])
+				[KEEP_COL]
 			)
 
 			return final_df
@@ -347,6 +380,10 @@ class CalcEnhanceDf:
 
 		elif (travel_type == "Stationary"):
 
+			# A single stop sequence - its schedule row is taken directly (scalars) instead of joining; otherwise join.
+			stp_seq   = semi_final_df['stop_seque'].iloc[0]
+			stp_sched = schedule.loc[stp_seq] if (len(semi_final_df) == 1 and stp_seq in schedule.index) else None
+
 			final_df = (
 				semi_final_df
 					.assign(trip_id    = trip_id,
@@ -359,10 +396,10 @@ class CalcEnhanceDf:
 				            status     = 'Stationary',
 				            dist_futr  = None,
 				            futr_trvel = None)
-					.merge(sub_stp_time_df, on=['trip_id', 'stop_seque'])
+					.pipe(lambda d: d.assign(**stp_sched.to_dict()) if isinstance(stp_sched, Series) else d.join(schedule, on='stop_seque', how='inner'))
 					.rename(columns = {'departure_time' : 'dept_time'})
 					.assign(est_arr    = None,
-				            draft_date = lambda d: d['curr_time'].str.split(" ").str[0],
+				            draft_date = lambda d: d['curr_time'].str.slice(0, 10),
 				            tmp_arr    = lambda d: d['draft_date'] + " " + d['arrival_time'],
 				            off_earr   = None,
 				            sched_arr  = None,
@@ -370,7 +407,7 @@ class CalcEnhanceDf:
 				            off_arrdif = None,
 				            perc_chge  = None,
 				            perf_rate  = None)
-				[keep_col]
+				[KEEP_COL]
 			)
 
 			return final_df
@@ -404,10 +441,11 @@ class CalcEnhanceDf:
 				future_trvel_1 = round(((first_dist/1000)/proj_speed)*3600)
 				future_trvel_2 = round(((future_dist/1000) / proj_speed) * 3600)
 
+				# futr_trvel is the projected travel (seconds) of both veh. points - used as proj_trvel.
 				future_lst = [future_trvel_1, future_trvel_2]
-				proj_trvel = [round(((f/1000)/proj_speed)*3600) for f in future_lst]
+				proj_trvel = future_lst
+				est_arr    = [self._addTime(tmp_curr_time=t, proj_trvel=p) for t, p in zip(curr_time, proj_trvel)]
 
-				# Use futr_trvel to estimate proj_trvel instead!!
 				final_df = (
 					semi_final_df
 						.assign(trip_id    = trip_id,
@@ -420,21 +458,19 @@ class CalcEnhanceDf:
 					            proj_trvel = proj_trvel,
 					            status     = order_stat,
 					            dist_futr  = dist_futr,
-					            est_arr    = lambda d: d[['curr_time', 'proj_trvel']].apply(lambda e: self._addTime(*e), axis=1),
-					            draft_date = lambda d: d['curr_time'].str.split(" ").str[0])
-						.merge(sub_stp_time_df, on=['trip_id', 'stop_seque'])
+					            est_arr    = est_arr,
+					            draft_date = lambda d: d['curr_time'].str.slice(0, 10))
+						.join(schedule, on='stop_seque', how='inner')
 						.rename(columns={'departure_time': 'dept_time'})
 						.assign(sched_arr  = lambda d: d['draft_date'].iloc[0] + " " + d['arrival_time'],
 					            tmp_arr    = lambda d: d['draft_date'] + " " + d['arrival_time'],
-					            arr_tmedif = lambda d: d[['est_arr', 'tmp_arr']].apply(lambda r: TimeDelta(*r).change_time, axis=1),
+					            arr_tmedif = lambda d: TimeDelta.vectorized(d['est_arr'], d['tmp_arr']),
 					            off_earr   = lambda d: d['est_arr'],
 					            off_arrdif = lambda d: d['arr_tmedif'],
-                                off_arrdif_shift = lambda d: d['off_arrdif'].shift(-1),
-                                tmp_change = lambda d: d[['off_arrdif', 'off_arrdif_shift']].apply(lambda e: self._perfChange(*e), axis=1),
-                                perc_chge  = lambda d: d['tmp_change'].shift(1),
-                                perf_rate  = lambda d: d['off_arrdif'].apply(lambda e: self._classifyOnTime(e))
+                                perc_chge  = lambda d: self._perfChange(d['off_arrdif'], d['off_arrdif'].shift(-1)).shift(1),
+                                perf_rate  = lambda d: self._classifyOnTime(d['off_arrdif'])
 					    )
-					[keep_col]
+					[KEEP_COL]
 				)
 
 				return final_df
@@ -463,9 +499,9 @@ class CalcEnhanceDf:
                                 off_arrdif=None,
                                 perc_chge=None,
                                 perf_rate=None)
-						.merge(sub_stp_time_df, on=['trip_id', 'stop_seque'])
+						.join(schedule, on='stop_seque', how='inner')
 						.rename(columns={'departure_time': 'dept_time'})
-					[keep_col]
+					[KEEP_COL]
 				)
 
 				return fin_df
\ No newline at end of file
@@ -11,30 +11,166 @@ Requirements:
     - The receiver (larger VM) to have the authorized key (aka create SSH key pair). 
     - The sender (smaller VM) to have the .key file (acquire from the larger VM). 
   3) If automated, require crontab configuration (Linux) include creation of .sh file. 
+  4) rsync installed on both VMs (transfers over SSH). 
+  5) Optional - VMs in different regions: raise net.core.rmem_max / net.core.wmem_max (sysctl) on both VMs so the 
+     TCP buffers can cover the bandwidth-delay product of the link. 
     
 Instructions on how to set up SSH keys: 
   1) https://www.digitalocean.com/community/tutorials/how-to-set-up-ssh-keys-on-ubuntu-1804
   2) https://www.youtube.com/watch?v=Wm9N6SpAsqA
 """
 
-import glob
+import errno
+import queue
 import subprocess
 import os 
 import time 
 import shutil 
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
 from tqdm import tqdm 
 
-csv_files = glob.glob('PATH TO CSV FILES/GTFSRT_Calgary_*.csv')
+src_dir = 'PATH TO CSV FILES'
 
 hostname   = "username@ip_address" # the receiver VM 
 remotepath = "ABSOLUTE PATH IN RECEIVER VM TO STORE CSV FILES"
+key        = "path-in-sender-vm/name-of-.key"
+archive    = "PATH TO STORE TRANSFERRED CSV FILES IN SENDER VM"
 
-# Create a folder in the sender VM - this is to store csv files that have been successfully transferred 
-if os.path.exists('PATH TO STORE TRANSFERRED CSV FILES IN SENDER VM'):
-  os.mkdir('PATH TO STORE TRANSFERRED CSV FILES IN SENDER VM')
+# Reuse one SSH connection (master socket) for every transfer - later ones skip the key exchange & authentication. 
+ssh_opts = ['-o', 'ControlMaster=auto', 
+            '-o', f"ControlPath={os.path.expanduser('~/.ssh')}/cm-%r@%h:%p", 
+            '-o', 'ControlPersist=60s', 
+            # AES-GCM first (AES-NI on both VMs) - falls back to chacha20 if the receiver does not offer it. 
+            '-o', 'Ciphers=aes128-gcm@openssh.com,chacha20-poly1305@openssh.com', 
+            # Bulk transfer - mark the packets for throughput rather than low delay. 
+            '-o', 'IPQoS=throughput']
 
-# Transfer CSV files over to the receiver VM.
-for c in tqdm(csv_files):
-  p = subprocess.Popen(['scp', '-i', 'path-in-sender-vm/name-of-.key', c, ':'.join([hostname, remotepath])])
-  p.wait()
-  shutil.move(c, f"PATH TO STORE TRANSFERRED CSV FILES IN SENDER VM/{c}")
+# Concurrent rsync sessions - each one a channel of the master connection, so they count against the receiver's 
+# sshd MaxSessions (default 10) but not MaxStartups. Set SSH_MAX to match the receiver's cap. The pool & the 
+# in-flight batches are both bound to it. 
+N_SESSIONS = max(1, int(os.environ.get('SSH_MAX', 8)))
+
+# Files sent per rsync session. 
+BATCH_SIZE = 500
+
+
+def _iter_csvs(folder):
+  """
+  Lazily list the collected GTFS-RT csv files - the transfer starts with the first batch found instead of 
+  waiting for the whole folder to be listed. 
+
+  :param folder: The folder of the collected csv files.
+
+  :return: Generator of the csv files (GTFSRT_Calgary_*.csv) as os.DirEntry - path, name and size at hand.
+  """
+
+  with os.scandir(folder) as it:
+    for e in it:
+      if e.name.startswith('GTFSRT_Calgary_') and e.name.endswith('.csv') and e.is_file():
+        yield e
+
+
+def _send(files):
+  """
+  Transfer a batch of the CSV files over to the receiver VM - one rsync (file names relative to src_dir read 
+  from stdin, so there is no command line length limit). Files already on the receiver (same size & modification 
+  time) are skipped and interrupted transfers can be re-run. The CSV text is compressed on the wire (-z). 
+
+  :param files: List of the CSV files (os.DirEntry) to send.
+
+  :return: Tuple (0: The CSV files sent; 1: The number of bytes sent).
+  """
+
+  names = [e.name for e in files]
+  size  = sum(e.stat().st_size for e in files)  # Before the move - the entries are stat-ed where they were listed.
+
+  subprocess.run(['rsync', '-az', '--files-from=-', '-e', ' '.join(['ssh', '-i', key] + ssh_opts), 
+                  f'{src_dir}/', ':'.join([hostname, remotepath]) + '/'], 
+                 input='\n'.join(names), text=True, check=True)
+
+  return (files, size)
+
+
+def _mover(q):
+  """
+  Move the sent CSV files to the sent folder in the background - the transfers do not wait on the disk. 
+  One rename per file (the sent folder is on the same disk) - copy & delete only if it is on another mount. 
+
+  A failed move is kept in mover_error (re-raised by the main thread once the mover is joined) - the remaining 
+  batches are left where they are. 
+
+  :param q: Queue of the sent batches (lists of os.DirEntry) - None to stop.
+  """
+
+  for files in iter(q.get, None):
+    if mover_error:
+      continue  # Keep draining until the sentinel.
+    try:
+      for c in files:
+        dst = os.path.join(archive, c.name)
+        try:
+          os.replace(c.path, dst)
+        except OSError as e:
+          if e.errno != errno.EXDEV:
+            raise
+          shutil.move(c.path, dst)
+    except Exception as e:
+      mover_error.append(e)
+
+
+def _done(futures):
+  """
+  Hand the completed batches over to the background mover and report the bytes sent. 
+
+  :param futures: The completed futures of _send.
+  """
+
+  for f in futures:
+    files, size = f.result()
+    sent_q.put(files)
+    progress.update(size)
+
+
+# Create a folder in the sender VM (if it does not exist) - this is to store csv files that have been successfully transferred 
+os.makedirs(archive, exist_ok=True)
+
+# Open the master connection up front (authenticate once, then background) - the concurrent sessions attach to it 
+# instead of racing to become the master. 
+# Only the key file is offered (IdentitiesOnly) - the sessions attached to the master never load it again. 
+subprocess.run(['ssh', '-i', key, '-o', 'IdentitiesOnly=yes', '-MNf'] + ssh_opts + [hostname], check=True)
+
+# Transfer CSV files over to the receiver VM - batches are sent concurrently as they are listed, with at most 
+# N_SESSIONS in flight (the folder is never queued up as a whole). 
+# The sent batches are handed over to the background mover. 
+csv_files = _iter_csvs(src_dir)
+progress  = tqdm(unit='B', unit_scale=True)  # Bytes sent - updated once per completed batch.
+sent_q    = queue.Queue()
+mover_error = []  # Exception raised in the background mover (if any).
+mover     = threading.Thread(target=_mover, args=(sent_q,), daemon=True)
+mover.start()
+
+
+try:
+  with ThreadPoolExecutor(max_workers=N_SESSIONS) as ex:
+    pending = set()
+    for batch in iter(lambda: list(islice(csv_files, BATCH_SIZE)), []):
+      if len(pending) >= N_SESSIONS:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        _done(done)
+      pending.add(ex.submit(_send, batch))
+
+    _done(wait(pending).done)
+
+finally:
+  # Wait for the last moves - also when a transfer failed, so the batches already sent are moved. 
+  sent_q.put(None)
+  mover.join()
+  progress.close()
+
+  # Close the master connection. 
+  subprocess.run(['ssh', '-O', 'exit'] + ssh_opts + [hostname], check=False)
+
+if mover_error:
+  raise mover_error[0]
\ No newline at end of file